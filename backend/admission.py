@@ -0,0 +1,230 @@
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+
+
+class AdmissionRejected(Exception):
+    """A request was shed by admission control; maps to an HTTP 429 or 503 with Retry-After"""
+
+    def __init__(self, status_code, retry_after, message):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.message = message
+
+
+class TokenBucket:
+    """Token bucket refilled at `per_minute` tokens per minute, holding at most one minute's worth.
+
+    Tokens are reserved up front, so the balance can go negative; the deficit is the time
+    the caller has to wait. This keeps waiters in arrival order.
+    """
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.time()
+
+    def _refill(self, now):
+        # Wall-clock time can step backwards; an elapsed time below zero adds nothing
+        self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` tokens would be available"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def reserve(self, amount, now):
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount):
+        self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+
+class SharedBucketStore:
+    """Token bucket balances kept in SQLite, so every worker process draws from the same budget.
+
+    Each update loads the buckets, applies the change and writes them back in one
+    immediate transaction. Bucket times are wall-clock time.time(), so saved balances stay
+    valid across processes, reboots and hosts.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._db = None
+        self._db_lock = threading.Lock()
+
+    def open(self):
+        if self._db is not None:
+            return
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " name TEXT PRIMARY KEY,"
+            " tokens REAL NOT NULL,"
+            " updated REAL NOT NULL)"
+        )
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def update(self, buckets, fn):
+        """Return fn() run against the shared state of `buckets`, a {name: TokenBucket} dict"""
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for name, bucket in buckets.items():
+                    row = self._db.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+                    if row is not None:
+                        bucket.tokens, bucket.updated = row
+                result = fn()
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    [(name, bucket.tokens, bucket.updated) for name, bucket in buckets.items()],
+                )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+            return result
+
+
+class ModelAdmission:
+    """Requests-per-minute and tokens-per-minute limits for one model, with a bounded wait queue.
+
+    A limit of 0 disables that bucket. Callers wait at most `max_wait` seconds for capacity;
+    beyond that they are rejected with 429, and when `max_queue` callers are already waiting
+    new ones are rejected with 503. With a SharedBucketStore the buckets are shared with
+    other processes; the wait queue stays per process.
+    """
+
+    def __init__(self, rpm=0, tpm=0, max_queue=100, max_wait=10.0, model="default", store=None, on_wait=None):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.store = store
+        self.on_wait = on_wait
+        self._buckets = {
+            f"{model}:{kind}": bucket
+            for kind, bucket in (("requests", self.requests), ("tokens", self.tokens))
+            if bucket is not None
+        }
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def _reserve(self, tokens):
+        """Reserve capacity and return the wait before it is available, or raise AdmissionRejected"""
+        now = time.time()
+        wait = max(
+            self.requests.wait_time(1, now) if self.requests else 0.0,
+            self.tokens.wait_time(tokens, now) if self.tokens else 0.0,
+        )
+        if wait > 0 and self.waiting >= self.max_queue:
+            raise AdmissionRejected(503, math.ceil(wait), "Translation queue is full, please retry later")
+        if wait > self.max_wait:
+            raise AdmissionRejected(429, math.ceil(wait), "Rate limit reached for this model, please retry later")
+
+        if self.requests:
+            self.requests.reserve(1, now)
+        if self.tokens:
+            self.tokens.reserve(tokens, now)
+        return wait
+
+    def _refund(self, tokens):
+        if self.requests:
+            self.requests.refund(1)
+        if self.tokens:
+            self.tokens.refund(tokens)
+
+    async def _update(self, fn, *args):
+        if self.store is None:
+            return fn(*args)
+        return await asyncio.to_thread(self.store.update, self._buckets, lambda: fn(*args))
+
+    async def acquire(self, tokens):
+        if self.requests is None and self.tokens is None:
+            self.admitted += 1
+            return
+
+        try:
+            wait = await self._update(self._reserve, tokens)
+        except AdmissionRejected:
+            self.rejected += 1
+            raise
+        self.admitted += 1
+        if wait <= 0:
+            return
+
+        self.waiting += 1
+        if self.on_wait:
+            self.on_wait(1)
+        try:
+            await asyncio.sleep(wait)
+        except asyncio.CancelledError:
+            await self._update(self._refund, tokens)
+            raise
+        finally:
+            self.waiting -= 1
+            if self.on_wait:
+                self.on_wait(-1)
+
+    def stats(self):
+        return {
+            "rpm": self.requests.capacity if self.requests else None,
+            "tpm": self.tokens.capacity if self.tokens else None,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionController:
+    """Per-model admission control; `limits` maps a model name to {"rpm": ..., "tpm": ...}.
+
+    `store` is an optional SharedBucketStore for limits shared across processes, and
+    `on_wait(delta)` is called as callers start (+1) and stop (-1) waiting for capacity.
+    """
+
+    def __init__(self, default_rpm=0, default_tpm=0, limits=None, max_queue=100, max_wait=10.0,
+                 store=None, on_wait=None):
+        self.default_rpm = default_rpm
+        self.default_tpm = default_tpm
+        self.limits = limits or {}
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.store = store
+        self.on_wait = on_wait
+        self._models = {}
+
+    def for_model(self, model):
+        admission = self._models.get(model)
+        if admission is None:
+            limits = self.limits.get(model, {})
+            admission = self._models[model] = ModelAdmission(
+                rpm=limits.get("rpm", self.default_rpm),
+                tpm=limits.get("tpm", self.default_tpm),
+                max_queue=self.max_queue,
+                max_wait=self.max_wait,
+                model=model,
+                store=self.store,
+                on_wait=self.on_wait,
+            )
+        return admission
+
+    async def acquire(self, model, tokens):
+        await self.for_model(model).acquire(tokens)
+
+    def stats(self):
+        return {model: admission.stats() for model, admission in self._models.items()}
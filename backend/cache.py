@@ -0,0 +1,223 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_HORIZONTAL_SPACE = re.compile(r"[ \t\f\v]+")
+
+
+def normalize_text(text):
+    """Normalize text for cache lookups: NFC, trimmed, runs of spaces collapsed, newlines kept"""
+    text = unicodedata.normalize("NFC", text).strip()
+    return "\n".join(_HORIZONTAL_SPACE.sub(" ", line).strip() for line in text.splitlines())
+
+
+def make_cache_key(text, language, model, prompt_version):
+    payload = json.dumps([normalize_text(text), language, model, prompt_version], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """Two-tier translation cache: an in-process LRU with TTL, backed by an optional SQLite file.
+
+    The SQLite tier survives restarts and is shared by every worker process using the same
+    file; entries found there are promoted into the LRU tier. It is connected by open(), so
+    the cache can be created before worker processes are forked.
+
+    Purges are recorded in the SQLite file too. Every process checks for purges made by the
+    others at most every `sync_interval` seconds, on a lookup, and drops the matching entries
+    from its LRU tier, so a purge reaches every worker within that time.
+    """
+
+    def __init__(self, max_entries=10000, ttl=86400, db_path=None, sync_interval=1.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.sync_interval = sync_interval
+        self._entries = OrderedDict()
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._purge_id = 0
+        self._next_sync = 0.0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def open(self):
+        """Connect the SQLite tier, if one is configured"""
+        if not self.db_path or self._db is not None:
+            return
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " key TEXT PRIMARY KEY,"
+            " language TEXT NOT NULL,"
+            " model TEXT NOT NULL,"
+            " output TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS purges ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " language TEXT,"
+            " model TEXT,"
+            " purged_at REAL NOT NULL)"
+        )
+        self._db.commit()
+        # Earlier purges are already reflected in the (empty) LRU tier of a new process
+        self._purge_id = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM purges").fetchone()[0]
+        logger.info(f"Translation cache persisted to {self.db_path}")
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    # In-process tier
+
+    def _memory_get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        output, expires_at = entry[0], entry[1]
+        if expires_at < now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return output
+
+    def _memory_purge(self, language, model, before=None):
+        """Drop LRU entries for `language` / `model` (all when None), only those created before `before` if given"""
+        keys = [
+            key for key, (_, expires_at, entry_language, entry_model) in self._entries.items()
+            if (not language or entry_language == language) and (not model or entry_model == model)
+            and (before is None or expires_at - self.ttl <= before)
+        ]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def _memory_set(self, key, output, language, model, created_at):
+        self._entries[key] = (output, created_at + self.ttl, language, model)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # SQLite tier
+
+    def _disk_get(self, key, now):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT output, created_at, language, model FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] + self.ttl < now:
+            return None
+        return row
+
+    def _disk_set(self, key, language, model, output, created_at):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO translations (key, language, model, output, created_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, language, model, output, created_at),
+            )
+            self._db.commit()
+
+    def _disk_purge(self, language, model):
+        clauses, params = [], []
+        if language:
+            clauses.append("language = ?")
+            params.append(language)
+        if model:
+            clauses.append("model = ?")
+            params.append(model)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        now = time.time()
+        with self._db_lock:
+            deleted = self._db.execute(f"DELETE FROM translations{where}", params).rowcount
+            # Other processes apply this to their LRU tier; entries older than the TTL are gone anyway
+            self._db.execute(
+                "INSERT INTO purges (language, model, purged_at) VALUES (?, ?, ?)", (language, model, now)
+            )
+            self._db.execute("DELETE FROM purges WHERE purged_at < ?", (now - self.ttl,))
+            self._db.commit()
+        return deleted
+
+    def _disk_purges(self):
+        """Purges recorded since the last one applied, as (id, language, model, purged_at) rows"""
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT id, language, model, purged_at FROM purges WHERE id > ? ORDER BY id", (self._purge_id,)
+            ).fetchall()
+
+    def _disk_count(self):
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    # Public API
+
+    async def sync(self):
+        """Apply purges made by other processes to the LRU tier"""
+        for purge_id, language, model, purged_at in await asyncio.to_thread(self._disk_purges):
+            self._memory_purge(language, model, before=purged_at)
+            self._purge_id = max(self._purge_id, purge_id)
+
+    async def get(self, key):
+        """Return the cached output for `key`, or None"""
+        now = time.time()
+        if self._db is not None and now >= self._next_sync:
+            self._next_sync = now + self.sync_interval
+            await self.sync()
+        output = self._memory_get(key, now)
+        if output is not None:
+            self.memory_hits += 1
+            return output
+        if self._db is not None:
+            row = await asyncio.to_thread(self._disk_get, key, now)
+            if row is not None:
+                self.disk_hits += 1
+                output, created_at, language, model = row
+                self._memory_set(key, output, language, model, created_at)
+                return output
+        self.misses += 1
+        return None
+
+    async def set(self, key, output, language, model):
+        now = time.time()
+        self._memory_set(key, output, language, model, now)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, language, model, output, now)
+
+    async def purge(self, language=None, model=None):
+        """Remove entries, optionally only those for one language and/or model"""
+        purged = self._memory_purge(language, model)
+        if self._db is not None:
+            purged = max(purged, await asyncio.to_thread(self._disk_purge, language, model))
+        return purged
+
+    async def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        stats = {
+            "memory_entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "persistent": self._db is not None,
+        }
+        if self._db is not None:
+            stats["disk_entries"] = await asyncio.to_thread(self._disk_count)
+        return stats
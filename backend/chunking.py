@@ -0,0 +1,134 @@
+import re
+
+# Separators from coarsest to finest; each captures the whitespace it splits on so it can be restored.
+# Pieces are then packed back together, paragraphs included, into chunks as large as the budget allows.
+_SPLITTERS = [
+    re.compile(r"(\s*\n[ \t]*\n\s*)"),
+    # Terminal punctuation: Latin, Devanagari and Arabic followed by whitespace, CJK (full-width)
+    # with or without it, since Chinese and Japanese put no space between sentences
+    re.compile(r"((?<=[.!?;…।؟])\s+|(?<=[。！？；])\s*)"),
+    re.compile(r"(\s*\n\s*)"),
+    re.compile(r"(\s+)"),
+]
+
+
+# Han, kana and Hangul: about a token per character or more, where other scripts take about four
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+
+def _measure(text):
+    """(CJK characters, characters, words) of `text`; each adds up over concatenated pieces"""
+    return len(_CJK.findall(text)), len(text), len(text.split())
+
+
+def _tokens(cjk, length, words):
+    return max(cjk + (length - cjk) // 4, words)
+
+
+def estimate_tokens(text):
+    """Cheap token estimate: roughly four characters per token and one per CJK character, but
+    never fewer than words"""
+    return _tokens(*_measure(text))
+
+
+def _pack(chunks, max_tokens):
+    """Merge neighbouring (content, separator) chunks while they stay within `max_tokens`"""
+    packed = []
+    sizes = []
+    for content, separator in chunks:
+        size = _measure(content)
+        if packed:
+            previous, previous_separator = packed[-1]
+            # Words of pieces joined without whitespace are counted twice, which errs on the safe side
+            merged = tuple(map(sum, zip(sizes[-1], _measure(previous_separator), size)))
+            if _tokens(*merged) <= max_tokens:
+                packed[-1] = (previous + previous_separator + content, separator)
+                sizes[-1] = merged
+                continue
+        packed.append((content, separator))
+        sizes.append(size)
+    return packed
+
+
+def _split_characters(text, max_tokens):
+    """Last resort for text without any separator, e.g. a long run of CJK without punctuation:
+    cut it every `max_tokens` characters, which holds at most `max_tokens` tokens"""
+    return [(text[i:i + max_tokens], "") for i in range(0, len(text), max(1, max_tokens))]
+
+
+def _chunk(text, max_tokens, level=0):
+    """Split `text` (no edge whitespace) into (content, separator) chunks within `max_tokens`"""
+    if estimate_tokens(text) <= max_tokens:
+        return [(text, "")]
+    if level == len(_SPLITTERS):
+        return _split_characters(text, max_tokens)
+
+    parts = _SPLITTERS[level].split(text)
+    chunks = []
+    for i in range(0, len(parts), 2):
+        content = parts[i]
+        separator = parts[i + 1] if i + 1 < len(parts) else ""
+        if not content:
+            if chunks:
+                chunks[-1] = (chunks[-1][0], chunks[-1][1] + separator)
+            continue
+        sub = _chunk(content, max_tokens, level + 1)
+        sub[-1] = (sub[-1][0], sub[-1][1] + separator)
+        chunks.extend(sub)
+    return _pack(chunks, max_tokens)
+
+
+def segment(text, max_tokens=800):
+    """Split `text` on paragraphs, then sentences, lines and words, into chunks within `max_tokens`.
+
+    Returns (leading, chunks, trailing) where chunks is a list of (content, separator) pairs;
+    every piece of whitespace between chunks is kept in the separators.
+    """
+    stripped = text.strip()
+    if not stripped:
+        return text, [], ""
+    leading = text[:len(text) - len(text.lstrip())]
+    trailing = text[len(leading) + len(stripped):]
+    return leading, _chunk(stripped, max_tokens), trailing
+
+
+def reassemble(leading, chunks, translations, trailing):
+    """Put translated chunks back in their original order and whitespace"""
+    parts = [leading]
+    for (_, separator), translation in zip(chunks, translations):
+        parts.append(translation.strip())
+        parts.append(separator)
+    parts.append(trailing)
+    return "".join(parts)
+
+
+def _split(text, splitter):
+    """Split `text` into (content, separator) pairs on `splitter`, keeping every separator"""
+    parts = splitter.split(text)
+    pairs = []
+    for i in range(0, len(parts), 2):
+        content = parts[i]
+        separator = parts[i + 1] if i + 1 < len(parts) else ""
+        if content:
+            pairs.append((content, separator))
+        elif pairs:
+            pairs[-1] = (pairs[-1][0], pairs[-1][1] + separator)
+    return pairs
+
+
+def sentences(text):
+    """Split `text` into paragraphs, sentences and lines, however short; same result shape as segment()"""
+    stripped = text.strip()
+    if not stripped:
+        return text, [], ""
+    leading = text[:len(text) - len(text.lstrip())]
+    trailing = text[len(leading) + len(stripped):]
+    pieces = [(stripped, "")]
+    for splitter in _SPLITTERS[:3]:
+        split = []
+        for content, separator in pieces:
+            sub = _split(content, splitter)
+            sub[-1] = (sub[-1][0], sub[-1][1] + separator)
+            split.extend(sub)
+        pieces = split
+    return leading, pieces, trailing
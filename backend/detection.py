@@ -0,0 +1,189 @@
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+# Only this much of a text is looked at; enough to tell the language of long documents
+SAMPLE_CHARS = 2000
+
+_WORD = re.compile(r"[^\W\d_]+")
+
+# Scripts used by a single supported language. Letters of other scripts (Latin, Han, kana)
+# need a closer look; see detect_language.
+SCRIPT_LANGUAGES = {
+    "ARABIC": "Arabic",
+    "CYRILLIC": "Russian",
+    "DEVANAGARI": "Hindi",
+    "GREEK": "Greek",
+    "HANGUL": "Korean",
+}
+
+# Scripts that unsupported languages write as well (Bulgarian and Ukrainian in Cyrillic,
+# Persian in Arabic, Marathi in Devanagari, Japanese kanji without kana in Han). The script
+# alone only suggests the language, so the confidence stays at SCRIPT_ONLY_CONFIDENCE: enough
+# to report, never enough to return a text untranslated.
+SHARED_SCRIPTS = {"ARABIC", "CYRILLIC", "DEVANAGARI", "HAN"}
+SCRIPT_ONLY_CONFIDENCE = 0.5
+
+# Letters of these scripts that the supported languages do not use, e.g. Persian and Urdu
+# letters in Arabic script, Ukrainian letters in Cyrillic or Polish and Czech letters in Latin;
+# their presence means "unknown"
+FOREIGN_LETTERS = {
+    "ARABIC": set("پچژگکیٹڈڑںھے"),
+    "CYRILLIC": set("іїєґўјљњћђџ"),
+    "LATIN": set("ąćęłńśźżčďěňřšťůžľĺŕőűățșåøþðāēīūļķņģėįų"),
+}
+
+# Share of a text's words that are listed in STOPWORDS for its language in ordinary prose;
+# a text reaching it counts as fully matched
+STOPWORD_SHARE = 0.5
+
+# Frequent function words and greetings per Latin-script language. A word listed for several
+# languages counts for each of them, so it adds evidence without settling anything.
+STOPWORDS = {
+    "English": set(
+        "the and of to is are was were be been have has had that this with for not you your it its "
+        "they their we our what which who how why when where there from but would could should will "
+        "can do does did an at by on in as or if my me he she his her them these those than then "
+        "a i hello hi thanks thank please yes goodbye today good morning"
+        .split()
+    ),
+    "French": set(
+        "le la les des du un une et est sont dans pour pas que qui ne sur au aux avec ce cette ces "
+        "il elle ils elles nous vous je tu mon ma mes son sa ses leur mais ou où donc très plus "
+        "être avoir fait comme tout bonjour merci oui salut aujourd hui c est j ai"
+        .split()
+    ),
+    "Spanish": set(
+        "el la los las un una unos unas y es son está están en por para que qué no con del al lo "
+        "se su sus mi mis tu yo él ella nosotros usted pero muy más como cuando donde dónde hay "
+        "ser estar hola gracias sí adiós hoy buenos buenas"
+        .split()
+    ),
+    "Portuguese": set(
+        "o a os as um uma e é são está estão em no na nos nas por para que não com do da dos das ao "
+        "se seu sua meu minha eu você ele ela nós mas muito mais como quando onde há ser estar "
+        "olá obrigado obrigada sim tchau hoje bom dia"
+        .split()
+    ),
+    "Italian": set(
+        "il lo la i gli le un uno una e è sono in per che non con del della dei delle al alla di da "
+        "si suo sua mio mia io tu lui lei noi voi ma molto più come quando dove essere avere "
+        "ciao grazie sì buongiorno oggi"
+        .split()
+    ),
+    "German": set(
+        "der die das den dem des ein eine einen und ist sind war nicht mit für auf im in zu von "
+        "es sie er ich du wir ihr mein dein sein aber sehr mehr wie wann wo auch noch nur schon "
+        "hallo danke dank vielen bitte ja nein heute guten tag"
+        .split()
+    ),
+    "Dutch": set(
+        "de het een en is zijn was niet met voor op in te van dat die dit er ik je jij wij zij hij "
+        "mijn maar heel meer hoe wanneer waar ook nog al hallo dank bedankt alsjeblieft ja nee "
+        "vandaag goedemorgen"
+        .split()
+    ),
+    "Turkish": set(
+        "ve bir bu da de için ile değil ne çok daha gibi ama ben sen o biz siz onlar var yok mı "
+        "mi mu mü nasıl neden nerede şimdi merhaba teşekkürler teşekkür ederim evet hayır bugün "
+        "günaydın"
+        .split()
+    ),
+}
+
+# Languages each listed word counts for
+_WORD_LANGUAGES = {}
+for _language, _words in STOPWORDS.items():
+    for _word in _words:
+        _WORD_LANGUAGES.setdefault(_word, []).append(_language)
+
+# Letters that, among the supported languages, only one Latin-script language uses
+MARKER_LETTERS = {
+    "German": set("ßä"),
+    "Spanish": set("ñ¿¡"),
+    "Portuguese": set("ãõ"),
+    "French": set("œèêëîû"),
+    "Italian": set("ìò"),
+    "Turkish": set("ğşı"),
+}
+
+
+@lru_cache(maxsize=4096)
+def script_of(char):
+    """Unicode script of a letter, from its character name (e.g. "LATIN", "HAN", "HIRAGANA")"""
+    if char.isascii():
+        return "LATIN"
+    name = unicodedata.name(char, "")
+    if name.startswith(("CJK", "KANGXI")):
+        return "HAN"
+    if name.startswith("HANGUL"):
+        return "HANGUL"
+    return name.split(" ", 1)[0]
+
+
+def detect_language(text):
+    """Guess which supported language `text` is written in, offline and in microseconds.
+
+    Returns {"language", "script", "confidence"}; language is None when the text gives too
+    little evidence. Single-language scripts decide by the share of their letters; Han text is
+    Japanese when it contains kana and Chinese otherwise; Latin text is scored on frequent words
+    and language-specific letters. Scripts that unsupported languages share cap the confidence
+    at SCRIPT_ONLY_CONFIDENCE.
+    """
+    sample = unicodedata.normalize("NFC", text[:SAMPLE_CHARS])
+    scripts = Counter()
+    for char, count in Counter(sample).items():
+        if char.isalpha():
+            scripts[script_of(char)] += count
+    letters = sum(scripts.values())
+    if not letters:
+        return {"language": None, "script": None, "confidence": 0.0}
+
+    # Japanese mixes kana with Han characters; count them together
+    kana = scripts.pop("HIRAGANA", 0) + scripts.pop("KATAKANA", 0)
+    if kana:
+        scripts["HAN"] += kana
+    script = max(scripts, key=scripts.get)
+    count = scripts[script]
+    share = count / letters
+
+    if FOREIGN_LETTERS.get(script, set()).intersection(sample.casefold()):
+        language, confidence = None, 0.0
+    elif script == "LATIN":
+        language, confidence = _detect_latin(sample.casefold())
+    elif script == "HAN":
+        language = "Japanese" if kana else "Chinese"
+        confidence = 1 - 0.5 ** count
+    elif script in SCRIPT_LANGUAGES:
+        language = SCRIPT_LANGUAGES[script]
+        confidence = 1 - 0.5 ** count
+    else:
+        language, confidence = None, 0.0
+    if script in SHARED_SCRIPTS and not kana:
+        confidence = min(confidence, SCRIPT_ONLY_CONFIDENCE)
+    return {"language": language, "script": script.lower(), "confidence": round(confidence * share, 3)}
+
+
+def _detect_latin(text):
+    """(language, confidence) for Latin-script text"""
+    scores = dict.fromkeys(STOPWORDS, 0)
+    words = Counter(_WORD.findall(text))
+    for word, count in words.items():
+        for language in _WORD_LANGUAGES.get(word, ()):
+            scores[language] += count
+        if not word.isascii():
+            for language, letters in MARKER_LETTERS.items():
+                if letters.intersection(word):
+                    scores[language] += count
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (language, best), (_, second) = ranked[0], ranked[1]
+    if best == second:
+        return None, 0.0
+    # A language wins on its listed words, but unlisted words may be of a language that is not
+    # supported at all (Polish "to jest mój dom i to" has three English ones), so the confidence
+    # is the share of the text's words that count for the winner, relative to STOPWORD_SHARE.
+    # Every word of lead over the runner-up halves the remaining doubt: a lead of one word
+    # gives at most 0.5, a lead of four 0.94.
+    share = min(1.0, best / sum(words.values()) / STOPWORD_SHARE)
+    return language, share * (1 - 0.5 ** (best - second))
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FakeUpstreamError(RuntimeError):
+    """Injected failure, standing in for a transient Groq API error"""
+
+    retryable = True
+
+
+class FakeChatModel(BaseChatModel):
+    """Offline stand-in for ChatGroq, used for benchmarks and load tests.
+
+    Answers after `latency_ms` (+/- `jitter_ms`), or after `slow_ms` with probability
+    `slow_rate` (a latency tail), fails with probability `error_rate`, and streams the answer word by word with `token_delay_ms` between chunks.
+    The answer echoes the user message tagged with the model name; a JSON array input
+    (a micro-batched prompt) gets a JSON array of tagged items back, and a multi-language
+    prompt gets a JSON object keyed by language.
+    """
+
+    model_name: str = "fake"
+    latency_ms: float = 200
+    jitter_ms: float = 50
+    slow_rate: float = 0.0
+    slow_ms: float = 5000
+    error_rate: float = 0.0
+    token_delay_ms: float = 10
+
+    @classmethod
+    def from_env(cls, model_name):
+        # FAKE_LLM_MODEL_LATENCY_MS='{"model": ms}' gives models different speeds, e.g. to exercise model="auto"
+        latencies = json.loads(os.getenv("FAKE_LLM_MODEL_LATENCY_MS", "{}"))
+        return cls(
+            model_name=model_name,
+            latency_ms=float(latencies.get(model_name, os.getenv("FAKE_LLM_LATENCY_MS", "200"))),
+            jitter_ms=float(os.getenv("FAKE_LLM_JITTER_MS", "50")),
+            slow_rate=float(os.getenv("FAKE_LLM_SLOW_RATE", "0")),
+            slow_ms=float(os.getenv("FAKE_LLM_SLOW_MS", "5000")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            token_delay_ms=float(os.getenv("FAKE_LLM_TOKEN_DELAY_MS", "10")),
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _delay(self):
+        if random.random() < self.slow_rate:
+            return self.slow_ms / 1000
+        return max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+    def _answer(self, messages):
+        if random.random() < self.error_rate:
+            raise FakeUpstreamError(f"Injected failure from fake model {self.model_name}")
+        text = messages[-1].content if messages else ""
+        system = messages[0].content if len(messages) > 1 else ""
+        if "JSON object whose keys" in system:
+            # Multi-language prompt: answer every language named in the system prompt
+            names = system.split("languages: ", 1)[1].split(". Reply", 1)[0]
+            return json.dumps(
+                {name: f"[{self.model_name}:{name}] {text}" for name in names.split(", ")}, ensure_ascii=False
+            )
+        try:
+            items = json.loads(text)
+        except ValueError:
+            items = None
+        if isinstance(items, list):
+            return json.dumps([f"[{self.model_name}] {item}" for item in items], ensure_ascii=False)
+        return f"[{self.model_name}] {text}"
+
+    @staticmethod
+    def _chunks(answer):
+        words = answer.split(" ")
+        return [word + " " for word in words[:-1]] + words[-1:]
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(messages)))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(messages)))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self._delay())
+        for chunk in self._chunks(self._answer(messages)):
+            time.sleep(self.token_delay_ms / 1000)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self._delay())
+        for chunk in self._chunks(self._answer(messages)):
+            await asyncio.sleep(self.token_delay_ms / 1000)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
@@ -0,0 +1,183 @@
+import codecs
+import csv
+import io
+import itertools
+import json
+import re
+
+FILE_FORMATS = {
+    "txt": "text/plain",
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+# One line with its terminator; a trailing "\r" waits for the next chunk in case "\n" follows
+_LINE = re.compile(r"[^\r\n]*(?:\r\n|\r(?!\Z)|\n)")
+
+
+def detect_format(filename, requested=None):
+    """Pick the file format from an explicit request or the file extension; raises ValueError"""
+    if requested:
+        file_format = requested.lower()
+    else:
+        file_format = filename.rsplit(".", 1)[-1].lower() if "." in (filename or "") else ""
+    if file_format == "ndjson":
+        file_format = "jsonl"
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"Unsupported file format '{file_format}', expected one of: {', '.join(FILE_FORMATS)}")
+    return file_format
+
+
+def iter_lines(binary, chunk_size=64 * 1024):
+    """Decode a UTF-8 binary file incrementally, yielding lines with their line endings"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    while True:
+        chunk = binary.read(chunk_size)
+        buffer += decoder.decode(chunk, final=not chunk)
+        end = 0
+        for match in _LINE.finditer(buffer):
+            yield match.group()
+            end = match.end()
+        buffer = buffer[end:]
+        if not chunk:
+            if buffer:
+                yield buffer
+            return
+
+
+def take(records, count):
+    """Read up to `count` records; called in a worker thread since it reads the file"""
+    return list(itertools.islice(records, count))
+
+
+def split_padding(text):
+    """Split `text` into (leading whitespace, content, trailing whitespace)"""
+    content = text.strip()
+    if not content:
+        return text, "", ""
+    start = text.index(content)
+    return text[:start], content, text[start + len(content):]
+
+
+class TextFile:
+    """Plain text, translated line by line; blank lines and indentation are kept"""
+
+    header = ""
+
+    def __init__(self, lines):
+        self._lines = lines
+
+    def __iter__(self):
+        for line in self._lines:
+            body = line.rstrip("\r\n")
+            _, content, _ = split_padding(body)
+            yield line, [content] if content else []
+
+    def render(self, line, translations):
+        if not translations:
+            return line
+        body = line.rstrip("\r\n")
+        leading, _, trailing = split_padding(body)
+        return leading + translations[0] + trailing + line[len(body):]
+
+
+class CsvFile:
+    """CSV where only the chosen `columns` are translated.
+
+    Columns are header names, or 0-based indices when the file has no header row. The
+    header row is read on construction, so construct it off the event loop. Rows are written
+    with the line ending of the input's first line.
+    """
+
+    def __init__(self, lines, columns, header=True):
+        if not columns:
+            raise ValueError("columns is required for CSV files")
+        self.lineterminator = None
+        self._rows = csv.reader(self._watch(lines))
+        names = []
+        self.header = ""
+        if header:
+            names = next(self._rows, None) or []
+            self.header = self._format(names) if names else ""
+        self.columns = []
+        for column in columns:
+            if column in names:
+                self.columns.append(names.index(column))
+            elif column.isdigit():
+                self.columns.append(int(column))
+            else:
+                raise ValueError(f"Unknown CSV column '{column}'")
+
+    def _watch(self, lines):
+        """Pass `lines` through, taking note of the first line ending"""
+        for line in lines:
+            if self.lineterminator is None:
+                self.lineterminator = line[len(line.rstrip("\r\n")):] or None
+            yield line
+
+    def _format(self, row):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator=self.lineterminator or "\r\n").writerow(row)
+        return buffer.getvalue()
+
+    def _targets(self, row):
+        return [index for index in self.columns if index < len(row) and row[index].strip()]
+
+    def __iter__(self):
+        for row in self._rows:
+            yield row, [row[index] for index in self._targets(row)]
+
+    def render(self, row, translations):
+        row = list(row)
+        for index, translation in zip(self._targets(row), translations):
+            row[index] = translation
+        return self._format(row)
+
+
+class JsonlFile:
+    """JSON Lines where only the string values of the chosen top-level `keys` are translated.
+
+    Lines that are blank, invalid JSON or not objects are passed through unchanged.
+    """
+
+    header = ""
+
+    def __init__(self, lines, keys):
+        if not keys:
+            raise ValueError("keys is required for JSONL files")
+        self._lines = lines
+        self.keys = keys
+
+    def _targets(self, record):
+        return [key for key in self.keys if isinstance(record.get(key), str) and record[key].strip()]
+
+    def __iter__(self):
+        for line in self._lines:
+            try:
+                record = json.loads(line) if line.strip() else None
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                yield (line, None), []
+                continue
+            yield (line, record), [record[key] for key in self._targets(record)]
+
+    def render(self, entry, translations):
+        line, record = entry
+        if not translations:
+            return line
+        record = dict(record)
+        for key, translation in zip(self._targets(record), translations):
+            record[key] = translation
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def open_file(file_format, binary, columns=None, keys=None, header=True):
+    """Return a reader yielding (record, texts) with a render(record, translations) method"""
+    lines = iter_lines(binary)
+    if file_format == "csv":
+        return CsvFile(lines, columns, header=header)
+    if file_format == "jsonl":
+        return JsonlFile(lines, keys)
+    return TextFile(lines)
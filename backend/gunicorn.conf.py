@@ -0,0 +1,89 @@
+# Production entry point, run from backend/:
+#
+#     gunicorn -c gunicorn.conf.py server:app
+#
+# Runs WEB_CONCURRENCY uvicorn worker processes forked from a master that has already
+# imported the app, and points the per-process state that must be shared (cache, rate
+# limits, metrics) at local SQLite files and a Prometheus multiprocess directory.
+import math
+import os
+import shutil
+import tempfile
+
+
+def _read_words(path):
+    with open(path) as f:
+        return f.read().split()
+
+
+def cgroup_cpu_limit():
+    """CPU quota of the container in whole CPUs (cgroup v2, else v1), or None without one"""
+    try:
+        quota, period = _read_words("/sys/fs/cgroup/cpu.max")
+    except (OSError, ValueError):
+        try:
+            quota, = _read_words("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+            period, = _read_words("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        except (OSError, ValueError):
+            return None
+    if quota in ("max", "-1"):
+        return None
+    return max(1, math.ceil(int(quota) / int(period)))
+
+
+def available_cpus():
+    """CPUs this process may use: its CPU affinity, capped by the container's CPU quota.
+
+    os.cpu_count() reports the host's cores, which inside a container can be many more.
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    return min(cpus, limit) if limit else cpus
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(available_cpus())))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import server.py once in the master; workers fork with it loaded. Connections, pools and
+# background tasks are still created per worker at startup.
+preload_app = True
+
+# On SIGTERM a worker stops accepting connections and finishes in-flight requests, streams
+# included, for up to GRACEFUL_TIMEOUT seconds before it is killed
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "120"))
+keepalive = 5
+
+# Shared state, unless configured explicitly
+STATE_DIR = os.getenv("STATE_DIR", os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("CACHE_DB_PATH", os.path.join(STATE_DIR, "translation_cache.db"))
+os.environ.setdefault("ADMISSION_DB_PATH", os.path.join(STATE_DIR, "admission.db"))
+
+# Metric files of the previous run are cleared before any worker writes new ones; the
+# marker keeps a config reload (SIGHUP) from clearing the files of live workers
+METRICS_DIR = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(tempfile.gettempdir(), f"robotranslate-metrics-{os.getenv('PORT', '8000')}"),
+)
+if not os.environ.get("ROBOTRANSLATE_METRICS_READY"):
+    shutil.rmtree(METRICS_DIR, ignore_errors=True)
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    os.environ["ROBOTRANSLATE_METRICS_READY"] = "1"
+
+
+def when_ready(server):
+    """Load the LangChain / Groq stack in the master before the workers are forked.
+
+    server.py leaves it to a background warm-up, which keeps a single process quick to
+    start; here every worker then shares the loaded modules and becomes ready at once,
+    including workers restarted later.
+    """
+    from registry import load_llm_stack
+    load_llm_stack(os.getenv("LLM_BACKEND", "groq"))
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a worker that exited"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class HealthProbe:
+    """Runs `probe` in the background every `interval` seconds and keeps the last result.
+
+    `probe` is an async callable that raises on failure. Readers only ever see the cached
+    result, so a health check never waits on the upstream it reports on.
+    """
+
+    def __init__(self, probe, interval=60, timeout=10):
+        self.probe = probe
+        self.interval = interval
+        self.timeout = timeout
+        self._task = None
+        self.ok = None
+        self.error = None
+        self.checked_at = None
+        self.latency = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self):
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.probe(), timeout=self.timeout)
+            self.ok, self.error = True, None
+        except Exception as e:
+            self.ok, self.error = False, str(e) or type(e).__name__
+            logger.warning(f"Health probe failed: {self.error}")
+        self.latency = time.perf_counter() - started
+        self.checked_at = time.time()
+
+    async def _run(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def snapshot(self):
+        """Last probe result; `ok` is None until the first probe completes"""
+        return {
+            "ok": self.ok,
+            "error": self.error,
+            "checked_at": self.checked_at,
+            "age_seconds": round(time.time() - self.checked_at, 3) if self.checked_at else None,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "interval_seconds": self.interval,
+        }
+
+
+class Warmup:
+    """Runs the slow part of start-up, `warm_up` (an async callable), in the background.
+
+    The server answers liveness checks meanwhile; `ready` turns True once `warm_up`
+    returns, and `on_ready(seconds)` is called with how long it took. A failure is kept
+    in `error` and the server stays not ready.
+    """
+
+    def __init__(self, warm_up, on_ready=None):
+        self.warm_up = warm_up
+        self.on_ready = on_ready
+        self._task = None
+        self.ready = False
+        self.error = None
+        self.seconds = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.ready = False
+
+    async def _run(self):
+        started = time.perf_counter()
+        try:
+            await self.warm_up()
+            self.ready = True
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+            logger.error(f"Warm-up failed: {self.error}")
+        self.seconds = time.perf_counter() - started
+        if self.ready:
+            logger.info(f"Warm-up finished in {self.seconds:.2f}s")
+            if self.on_ready is not None:
+                self.on_ready(self.seconds)
+
+    def snapshot(self):
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "warmup_seconds": round(self.seconds, 3) if self.seconds is not None else None,
+        }
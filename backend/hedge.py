@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import math
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class Hedger:
+    """Hedged requests: a call that has not answered by the `percentile` latency of recent calls
+    of its kind gets a second, hedge call, and whichever succeeds first wins. The other is cancelled.
+
+    Latencies are kept per key (e.g. model and size class), the last `window` successful calls
+    each; no hedge is sent before `min_samples` of them are known. Hedges are capped at `budget`
+    extra calls per call: every call adds `budget` to a bucket holding at most `burst`, and each
+    hedge takes one from it. `on_result(result)` is called for every hedge decision: "hedged",
+    "won", "lost", "failed", "skipped" (no budget left) or "busy" (no spare capacity for a hedge).
+    """
+
+    def __init__(self, percentile=95, budget=0.05, burst=10, window=200, min_samples=20, min_delay=0.05,
+                 on_result=None):
+        self.percentile = percentile
+        self.budget = budget
+        self.burst = burst
+        self.window = window
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.on_result = on_result
+        self._latencies = {}
+        self._tokens = burst
+        self.counts = {"calls": 0, "hedged": 0, "won": 0, "lost": 0, "failed": 0, "skipped": 0, "busy": 0}
+
+    def _count(self, result):
+        self.counts[result] += 1
+        if self.on_result is not None:
+            self.on_result(result)
+
+    def observe(self, key, latency):
+        """Record the latency of a successful call of kind `key`"""
+        latencies = self._latencies.get(key)
+        if latencies is None:
+            latencies = self._latencies[key] = deque(maxlen=self.window)
+        latencies.append(latency)
+
+    def delay(self, key):
+        """Seconds to wait before hedging a call of kind `key`, or None while too few calls are known"""
+        latencies = self._latencies.get(key)
+        if latencies is None or len(latencies) < self.min_samples:
+            return None
+        ordered = sorted(latencies)
+        index = max(0, math.ceil(self.percentile / 100 * len(ordered)) - 1)
+        return max(self.min_delay, ordered[index])
+
+    async def run(self, key, primary, hedge, started=None, can_hedge=None):
+        """Return ("primary" | "hedge", result) of the first of `primary()` and a later `hedge()` to succeed.
+
+        `hedge` is only called when `primary` is still running after delay(key) and the budget
+        allows it. When both fail, the primary's error is raised. The delay counts from when the
+        `started` event is set, if given: the recorded latencies should not include time spent
+        queueing for a concurrency slot. No hedge is sent while `can_hedge()` returns False.
+        """
+        self.counts["calls"] += 1
+        self._tokens = min(self.burst, self._tokens + self.budget)
+        first = asyncio.ensure_future(primary())
+        second = waiter = None
+        try:
+            delay = self.delay(key)
+            if delay is not None and started is not None:
+                waiter = asyncio.ensure_future(started.wait())
+                await asyncio.wait({first, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            if delay is not None and not first.done():
+                await asyncio.wait({first}, timeout=delay)
+            if delay is None or first.done():
+                return "primary", await first
+            if can_hedge is not None and not can_hedge():
+                self._count("busy")
+                return "primary", await first
+            if self._tokens < 1:
+                self._count("skipped")
+                return "primary", await first
+
+            self._tokens -= 1
+            self._count("hedged")
+            second = asyncio.ensure_future(hedge())
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in (first, second):
+                    if task in done and task.exception() is None:
+                        self._count("won" if task is second else "lost")
+                        return ("hedge" if task is second else "primary"), task.result()
+            self._count("failed")
+            logger.warning(f"Hedged call failed twice: {second.exception()}")
+            return "primary", first.result()
+        finally:
+            for task in (first, second, waiter):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def stats(self):
+        decided = self.counts["won"] + self.counts["lost"]
+        return {
+            **self.counts,
+            "percentile": self.percentile,
+            "budget": self.budget,
+            "win_rate": round(self.counts["won"] / decided, 4) if decided else 0.0,
+            "hedge_rate": round(self.counts["hedged"] / self.counts["calls"], 4) if self.counts["calls"] else 0.0,
+            "delays_ms": {
+                ":".join(map(str, key)): round(delay * 1000, 1)
+                for key in self._latencies
+                if (delay := self.delay(key)) is not None
+            },
+        }
@@ -0,0 +1,333 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: no file locks, so every process runs its own job workers
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobStore:
+    """Translation jobs and their items in SQLite, so queued and half-done jobs survive restarts"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._db = None
+        self._db_lock = threading.Lock()
+
+    def open(self):
+        if self._db is not None:
+            return
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " total INTEGER NOT NULL,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS job_items ("
+            " job_id TEXT NOT NULL,"
+            " idx INTEGER NOT NULL,"
+            " text TEXT NOT NULL,"
+            " language TEXT NOT NULL,"
+            " model TEXT,"
+            " status TEXT,"
+            " result TEXT,"
+            " PRIMARY KEY (job_id, idx))"
+        )
+        self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def create(self, items):
+        """Store a new queued job for (text, language, model) items; returns its id"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._db_lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, total, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, len(items), now, now),
+            )
+            self._db.executemany(
+                "INSERT INTO job_items (job_id, idx, text, language, model) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, index, text, language, model) for index, (text, language, model) in enumerate(items)],
+            )
+            self._db.commit()
+        return job_id
+
+    def set_status(self, job_id, status, error=None, only_if=None):
+        """Update a job's status; with `only_if`, only when its current status is one of those.
+
+        Returns whether the job was updated.
+        """
+        query = "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?"
+        params = [status, error, time.time(), job_id]
+        if only_if:
+            query += f" AND status IN ({', '.join('?' * len(only_if))})"
+            params.extend(only_if)
+        with self._db_lock:
+            updated = self._db.execute(query, params).rowcount
+            self._db.commit()
+        return updated > 0
+
+    def unfinished(self):
+        """Ids of queued and interrupted jobs, oldest first; running jobs are reset to queued"""
+        with self._db_lock:
+            self._db.execute("UPDATE jobs SET status = ? WHERE status = ?", (QUEUED, RUNNING))
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def queued(self):
+        """Ids of queued jobs, oldest first"""
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def pending_items(self, job_id):
+        """(index, text, language, model) of the items that have no result yet"""
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT idx, text, language, model FROM job_items WHERE job_id = ? AND result IS NULL ORDER BY idx",
+                (job_id,),
+            ).fetchall()
+
+    def save_result(self, job_id, index, result):
+        """Store one item's result; returns the job's current status"""
+        with self._db_lock:
+            self._db.execute(
+                "UPDATE job_items SET status = ?, result = ? WHERE job_id = ? AND idx = ?",
+                (result["status"], json.dumps(result, ensure_ascii=False), job_id, index),
+            )
+            self._db.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+            self._db.commit()
+            row = self._db.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def load(self, job_id, offset=0, limit=100):
+        """Return the job with its progress and up to `limit` finished results from `offset`, or None"""
+        with self._db_lock:
+            job = self._db.execute(
+                "SELECT status, total, error, created_at, updated_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            counts = dict(self._db.execute(
+                "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? AND status IS NOT NULL GROUP BY status",
+                (job_id,),
+            ).fetchall())
+            rows = self._db.execute(
+                "SELECT idx, result FROM job_items WHERE job_id = ? AND result IS NOT NULL"
+                " ORDER BY idx LIMIT ? OFFSET ?",
+                (job_id, limit, offset),
+            ).fetchall()
+        status, total, error, created_at, updated_at = job
+        done = sum(counts.values())
+        response = {
+            "id": job_id,
+            "status": status,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "progress": {
+                "total": total,
+                "done": done,
+                "success": counts.get("success", 0),
+                "partial_success": counts.get("partial_success", 0),
+                "error": counts.get("error", 0),
+                "percent": round(100 * done / total, 1) if total else 100.0,
+            },
+            "results": [{"index": index, **json.loads(result)} for index, result in rows],
+        }
+        if error:
+            response["error"] = error
+        return response
+
+    def purge(self, older_than):
+        """Delete finished jobs last updated before the `older_than` timestamp"""
+        placeholders = ", ".join("?" * len(FINISHED))
+        with self._db_lock:
+            ids = [row[0] for row in self._db.execute(
+                f"SELECT id FROM jobs WHERE status IN ({placeholders}) AND updated_at < ?", (*FINISHED, older_than)
+            ).fetchall()]
+            self._db.executemany("DELETE FROM job_items WHERE job_id = ?", [(job_id,) for job_id in ids])
+            self._db.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in ids])
+            self._db.commit()
+        return len(ids)
+
+    def counts(self):
+        with self._db_lock:
+            return dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+class JobRunner:
+    """Background worker pool draining translation jobs from a JobStore.
+
+    `workers` jobs run at a time, each translating up to `item_concurrency` items at once with
+    `translate_item(text, language, model)`. Every result is saved as it completes, so a job
+    interrupted by a restart resumes with its remaining items. Finished jobs are deleted after
+    `retention` seconds.
+
+    When several server processes share the store, the one holding an exclusive lock on
+    `<db_path>.lock` runs the jobs and the others only queue and report them. The leader
+    picks up jobs queued elsewhere every `poll_interval` seconds, and another process takes
+    over within that time if the leader exits.
+    """
+
+    def __init__(self, store, translate_item, workers=2, item_concurrency=4, retention=7 * 86400, poll_interval=1.0):
+        self.store = store
+        self.translate_item = translate_item
+        self.workers = workers
+        self.item_concurrency = item_concurrency
+        self.retention = retention
+        self.poll_interval = poll_interval
+        self.leader = False
+        self._lock_file = None
+        self._supervisor = None
+        self._queue = None
+        self._enqueued = set()
+        self._workers = []
+        self._running = {}
+
+    async def start(self):
+        await asyncio.to_thread(self.store.open)
+        self._queue = asyncio.Queue()
+        self._supervisor = asyncio.create_task(self._supervise())
+
+    async def stop(self):
+        """Stop the workers; running jobs stay unfinished in the store and resume on the next start"""
+        tasks = [self._supervisor, *self._workers] if self._supervisor else self._workers
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._supervisor = None
+        self._workers = []
+        self._enqueued.clear()
+        self.leader = False
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _try_lead(self):
+        """Take the job-runner lock without waiting; returns whether this process now leads"""
+        if fcntl is None:
+            return True
+        lock_file = open(f"{self.store.db_path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _enqueue(self, job_id):
+        if job_id not in self._enqueued:
+            self._enqueued.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _supervise(self):
+        while True:
+            if self.leader:
+                for job_id in await asyncio.to_thread(self.store.queued):
+                    self._enqueue(job_id)
+            elif self._try_lead():
+                self.leader = True
+                await asyncio.to_thread(self.store.purge, time.time() - self.retention)
+                unfinished = await asyncio.to_thread(self.store.unfinished)
+                for job_id in unfinished:
+                    self._enqueue(job_id)
+                self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+                if unfinished:
+                    logger.info(f"Resuming {len(unfinished)} unfinished translation jobs")
+            await asyncio.sleep(self.poll_interval)
+
+    async def submit(self, items):
+        """Queue a job for (text, language, model) items and return its id"""
+        job_id = await asyncio.to_thread(self.store.create, items)
+        if self.leader:
+            self._enqueue(job_id)
+        return job_id
+
+    async def get(self, job_id, offset=0, limit=100):
+        return await asyncio.to_thread(self.store.load, job_id, offset, limit)
+
+    async def cancel(self, job_id):
+        """Cancel a queued or running job; returns False when it does not exist or already finished"""
+        cancelled = await asyncio.to_thread(self.store.set_status, job_id, CANCELLED, None, (QUEUED, RUNNING))
+        task = self._running.get(job_id)
+        if cancelled and task is not None:
+            task.cancel()
+        return cancelled
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            self._enqueued.discard(job_id)
+            if not await asyncio.to_thread(self.store.set_status, job_id, RUNNING, None, (QUEUED,)):
+                continue  # cancelled while queued
+            task = asyncio.create_task(self._run(job_id))
+            self._running[job_id] = task
+            try:
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            finally:
+                self._running.pop(job_id, None)
+
+            if task.cancelled():
+                logger.info(f"Translation job {job_id} cancelled")
+            elif task.exception() is not None:
+                logger.error(f"Translation job {job_id} failed: {task.exception()}")
+                await asyncio.to_thread(self.store.set_status, job_id, FAILED, str(task.exception()), (RUNNING,))
+            else:
+                await asyncio.to_thread(self.store.set_status, job_id, COMPLETED, None, (RUNNING,))
+            await asyncio.to_thread(self.store.purge, time.time() - self.retention)
+
+    async def _run(self, job_id):
+        items = iter(await asyncio.to_thread(self.store.pending_items, job_id))
+
+        async def drain():
+            for index, text, language, model in items:
+                result = await self.translate_item(text, language, model)
+                if await asyncio.to_thread(self.store.save_result, job_id, index, result) != RUNNING:
+                    return  # cancelled, possibly from another process
+
+        await asyncio.gather(*(drain() for _ in range(self.item_concurrency)))
+
+    async def stats(self):
+        return {
+            "leader": self.leader,
+            "workers": self.workers,
+            "item_concurrency": self.item_concurrency,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "running": len(self._running),
+            "jobs": await asyncio.to_thread(self.store.counts),
+        }
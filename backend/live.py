@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from collections import OrderedDict
+
+from chunking import sentences
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+
+
+class LiveSession:
+    """Translate-as-you-type state of one connection.
+
+    The client sends the whole text after every edit; update() only keeps the latest one,
+    and `debounce` seconds after the last edit the text is split into sentences and lines.
+    Sentences translated before, in this session, are reused at no cost; only new and edited
+    ones are passed to `translate(sentence)`, at most `concurrency` at a time. Translations
+    of sentences that were edited again or deleted before they finished are cancelled.
+
+    `send(message)` pushes "patch" messages: the segments (index, source, separator,
+    translation, status) that differ from the last patch sent, the new segment count and the
+    text's leading and trailing whitespace. A client applying them in order holds the
+    current translation; segments still being translated have status "pending" and a null
+    translation. Up to `max_memory` translated sentences are kept, least recently used
+    dropped first.
+    """
+
+    def __init__(self, translate, send, debounce=0.3, concurrency=4, max_memory=1000, on_segment=None):
+        self.translate = translate
+        self.send = send
+        self.debounce = debounce
+        self.max_memory = max_memory
+        self.on_segment = on_segment
+        self.version = 0
+        self._text = ""
+        self._applied = 0
+        self._segments = []
+        self._leading = self._trailing = ""
+        self._sent = []
+        self._sent_edges = ("", "")
+        self._memory = OrderedDict()
+        self._failed = {}
+        self._tasks = {}
+        self._timer = None
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._send_lock = asyncio.Lock()
+        self.counts = {"translated": 0, "reused": 0, "cancelled": 0}
+
+    def _count(self, result, count=1):
+        self.counts[result] += count
+        if self.on_segment is not None and count:
+            self.on_segment(result, count)
+
+    def update(self, text, version=None):
+        """Take the client's current `text`; it is applied once no edit followed for `debounce` seconds"""
+        self._text = text
+        self.version = self.version + 1 if version is None else version
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.ensure_future(self._apply_later())
+
+    async def _apply_later(self):
+        await asyncio.sleep(self.debounce)
+        self._timer = None
+        await self.apply()
+
+    async def apply(self):
+        """Segment the current text, start translating what is new and push the changes"""
+        self._leading, self._segments, self._trailing = sentences(self._text)
+        self._applied = self.version
+        current = {content for content, _ in self._segments}
+
+        for content in [content for content in self._tasks if content not in current]:
+            self._tasks.pop(content).cancel()
+            self._count("cancelled")
+
+        reused = 0
+        for content in current:
+            if content in self._memory:
+                self._memory.move_to_end(content)
+                reused += 1
+            elif content not in self._tasks:
+                # Failed sentences are retried with the next edit
+                self._failed.pop(content, None)
+                self._tasks[content] = asyncio.ensure_future(self._translate(content))
+        self._count("reused", reused)
+        for content in [content for content in self._failed if content not in current]:
+            del self._failed[content]
+        await self.push()
+
+    async def _translate(self, content):
+        try:
+            async with self._semaphore:
+                result = await self.translate(content)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Live translation error: {e}")
+            result = {"output": content, "status": "error", "message": str(e)}
+        finally:
+            if self._tasks.get(content) is asyncio.current_task():
+                del self._tasks[content]
+
+        self._count("translated")
+        if result.get("status") == "error":
+            self._failed[content] = result
+        else:
+            self._memory[content] = result
+            while len(self._memory) > self.max_memory:
+                self._memory.popitem(last=False)
+        await self.push()
+
+    def _state(self):
+        state = []
+        for index, (content, separator) in enumerate(self._segments):
+            result = self._memory.get(content) or self._failed.get(content)
+            state.append({
+                "index": index,
+                "source": content,
+                "separator": separator,
+                "translation": result["output"] if result is not None else None,
+                "status": result["status"] if result is not None else PENDING,
+            })
+        return state
+
+    async def push(self):
+        """Send the segments that changed since the last patch, if any"""
+        async with self._send_lock:
+            state = self._state()
+            edges = (self._leading, self._trailing)
+            changed = [segment for index, segment in enumerate(state)
+                       if index >= len(self._sent) or self._sent[index] != segment]
+            if not changed and len(state) == len(self._sent) and edges == self._sent_edges:
+                return
+            self._sent = state
+            self._sent_edges = edges
+            await self.send({
+                "type": "patch",
+                "version": self._applied,
+                "length": len(state),
+                "leading": self._leading,
+                "trailing": self._trailing,
+                "segments": changed,
+                "pending": sum(segment["status"] == PENDING for segment in state),
+            })
+
+    async def close(self):
+        """Cancel the pending edit and all running translations"""
+        tasks = [self._timer, *self._tasks.values()] if self._timer else list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._timer = None
+        self._tasks.clear()
+
+    def stats(self):
+        return {**self.counts, "segments": len(self._segments), "remembered": len(self._memory),
+                "translating": len(self._tasks)}
@@ -0,0 +1,296 @@
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from collections import Counter, defaultdict
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACE = re.compile(r"\s+")
+
+# MinHash parameters: NUM_BANDS bands of ROWS_PER_BAND rows. Texts whose shingle sets have a
+# Jaccard similarity above roughly (1 / NUM_BANDS) ** (1 / ROWS_PER_BAND) ~= 0.6 share a band.
+NUM_BANDS = 8
+ROWS_PER_BAND = 4
+_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [
+    (1 + (i * 0x9E3779B97F4A7C15) % (_PRIME - 1), (i * 0xC2B2AE3D27D4EB4F) % _PRIME)
+    for i in range(1, NUM_BANDS * ROWS_PER_BAND + 1)
+]
+
+
+def normalize_for_matching(text):
+    """Casefold and drop punctuation so strings that differ only in those match exactly"""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _SPACE.sub(" ", _NON_WORD.sub(" ", text)).strip()
+
+
+def shingles(text, size=3):
+    """Character n-grams of the normalized text"""
+    text = f" {normalize_for_matching(text)} "
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash_bands(shingle_set):
+    """Band keys of the MinHash signature of `shingle_set`"""
+    hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingle_set]
+    signature = [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+    return [
+        (band, hash(tuple(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])))
+        for band in range(NUM_BANDS)
+    ]
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def parse_bilingual(lines, file_format, language=None):
+    """Yield (source, translation, language) from JSONL or TSV lines.
+
+    JSONL lines are objects with "source", "target" and "language" keys; TSV lines are
+    `source<TAB>target`, with the language given by the caller.
+    """
+    for number, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        if file_format == "jsonl":
+            try:
+                record = json.loads(line)
+                yield record["source"], record["target"], record.get("language", language)
+            except (ValueError, KeyError, TypeError):
+                raise ValueError(f"Line {number}: expected a JSON object with source and target")
+        else:
+            parts = line.split("\t")
+            if len(parts) != 2:
+                raise ValueError(f"Line {number}: expected source<TAB>target")
+            yield parts[0], parts[1], language
+
+
+class TranslationMemory:
+    """Bilingual segments in SQLite, with an in-memory MinHash LSH index for near-duplicate lookup.
+
+    A stored segment is served as is only when it equals the query once both are normalized
+    (casefolded, punctuation dropped): near-duplicates such as "150 dollars" and "950 dollars"
+    or "will be shipped" and "will not be shipped" differ in exactly what matters. Otherwise
+    lookups find candidates sharing a MinHash band with the query in the same language and
+    rank them by character-trigram Jaccard similarity; the best one at or above
+    `reference_threshold` is shown to the model as an example.
+
+    Segments written by other processes sharing the file are picked up every
+    `sync_interval` seconds.
+    """
+
+    # Segments changed this long before the last one seen are re-read on sync, covering
+    # writes from other processes that committed out of timestamp order
+    SYNC_OVERLAP = 60
+
+    def __init__(self, db_path, reference_threshold=0.6, sync_interval=5.0):
+        self.db_path = db_path
+        self.reference_threshold = reference_threshold
+        self.sync_interval = sync_interval
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._data_version = None
+        self._synced_until = 0.0
+        self._sync_task = None
+        self._segments = {}
+        self._buckets = defaultdict(set)
+        self._exact = {}
+        self._languages = Counter()
+        self.counts = {"match": 0, "reference": 0, "miss": 0}
+
+    async def open(self):
+        """Connect to the SQLite file, index its segments and start syncing with other processes"""
+        if self._db is not None:
+            return
+        await asyncio.to_thread(self._connect)
+        loaded = await self.sync()
+        logger.info(f"Translation memory loaded {loaded} segments from {self.db_path}")
+        self._sync_task = asyncio.create_task(self._sync_periodically())
+
+    def _connect(self):
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            " id INTEGER PRIMARY KEY,"
+            " language TEXT NOT NULL,"
+            " source TEXT NOT NULL,"
+            " target TEXT NOT NULL,"
+            " origin TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " UNIQUE (language, source))"
+        )
+        self._db.commit()
+
+    async def aclose(self):
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def _changed_rows(self):
+        """Fingerprinted segments written by other connections since the last sync"""
+        with self._db_lock:
+            version = self._db.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return []
+            self._data_version = version
+            rows = self._db.execute(
+                "SELECT id, language, source, target, created_at FROM segments WHERE created_at >= ?",
+                (self._synced_until - self.SYNC_OVERLAP,),
+            ).fetchall()
+        if rows:
+            self._synced_until = max(self._synced_until, max(row[4] for row in rows))
+        changed = []
+        for row_id, language, source, target, _ in rows:
+            shingle_set = shingles(source)
+            changed.append((row_id, language, source, target, shingle_set, minhash_bands(shingle_set)))
+        return changed
+
+    async def sync(self):
+        """Index segments added or updated by other processes; returns how many were read"""
+        changed = await asyncio.to_thread(self._changed_rows)
+        for row in changed:
+            self._index(*row)
+        return len(changed)
+
+    async def _sync_periodically(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning(f"Translation memory sync failed: {e}")
+
+    def _index(self, row_id, language, source, target, shingle_set, bands):
+        previous = self._segments.get(row_id)
+        if previous is not None:
+            for band in previous[4]:
+                self._buckets[(previous[0], band)].discard(row_id)
+            key = (previous[0], normalize_for_matching(previous[1]))
+            if self._exact.get(key) == row_id:
+                del self._exact[key]
+            self._languages[previous[0]] -= 1
+        self._segments[row_id] = (language, source, target, shingle_set, bands)
+        for band in bands:
+            self._buckets[(language, band)].add(row_id)
+        self._exact[(language, normalize_for_matching(source))] = row_id
+        self._languages[language] += 1
+
+    def _store(self, entries, origin):
+        """Insert or update (source, target, language) entries; returns their row ids"""
+        now = time.time()
+        ids = []
+        with self._db_lock:
+            for source, target, language in entries:
+                self._db.execute(
+                    "INSERT INTO segments (language, source, target, origin, created_at) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT (language, source) DO UPDATE SET target = excluded.target,"
+                    " origin = excluded.origin, created_at = excluded.created_at",
+                    (language, source, target, origin, now),
+                )
+                ids.append(self._db.execute(
+                    "SELECT id FROM segments WHERE language = ? AND source = ?", (language, source)
+                ).fetchone()[0])
+            self._db.commit()
+        return ids
+
+    @staticmethod
+    def _fingerprint(entries):
+        fingerprints = []
+        for source, _, _ in entries:
+            shingle_set = shingles(source)
+            fingerprints.append((shingle_set, minhash_bands(shingle_set)))
+        return fingerprints
+
+    async def add(self, entries, origin="import"):
+        """Add (source, target, language) entries; storage and hashing run off the event loop"""
+        entries = [(source.strip(), target.strip(), language) for source, target, language in entries
+                   if source.strip() and target.strip() and language]
+        if not entries:
+            return 0
+        ids = await asyncio.to_thread(self._store, entries, origin)
+        fingerprints = await asyncio.to_thread(self._fingerprint, entries)
+        for row_id, (source, target, language), (shingle_set, bands) in zip(ids, entries, fingerprints):
+            self._index(row_id, language, source, target, shingle_set, bands)
+        return len(entries)
+
+    def lookup(self, text, language, fingerprint=None):
+        """Return the most similar stored segment as {source, target, similarity}, or None.
+
+        `fingerprint` is the (shingles, bands) of `text` when already computed.
+        """
+        shingle_set, bands = fingerprint or self._fingerprint([(text, None, None)])[0]
+        candidates = set()
+        for band in bands:
+            candidates |= self._buckets.get((language, band), set())
+        best, best_similarity = None, 0.0
+        for row_id in candidates:
+            _, source, target, candidate_shingles, _ = self._segments[row_id]
+            similarity = jaccard(shingle_set, candidate_shingles)
+            if similarity > best_similarity:
+                best, best_similarity = (source, target), similarity
+        if best is None:
+            return None
+        return {"source": best[0], "target": best[1], "similarity": round(best_similarity, 4)}
+
+    async def match(self, text, language):
+        """Classify the best stored segment for `text` as ("match" | "reference" | "miss", segment).
+
+        Only a normalized-exact match is a "match". Hashing the text for the similarity lookup
+        runs off the event loop, and is skipped when nothing is stored for `language`.
+        """
+        result, hit = "miss", None
+        if self._languages[language] > 0:
+            row_id = self._exact.get((language, normalize_for_matching(text)))
+            if row_id is not None:
+                _, source, target, _, _ = self._segments[row_id]
+                result, hit = "match", {"source": source, "target": target, "similarity": 1.0}
+            else:
+                fingerprint = (await asyncio.to_thread(self._fingerprint, [(text, None, None)]))[0]
+                hit = self.lookup(text, language, fingerprint)
+                if hit is not None and hit["similarity"] >= self.reference_threshold:
+                    result = "reference"
+                else:
+                    hit = None
+        self.counts[result] += 1
+        return result, hit
+
+    def export_rows(self):
+        """Yield every stored segment as a JSONL line"""
+        with self._db_lock:
+            rows = self._db.execute("SELECT language, source, target, origin FROM segments ORDER BY id").fetchall()
+        for language, source, target, origin in rows:
+            yield json.dumps(
+                {"source": source, "target": target, "language": language, "origin": origin}, ensure_ascii=False
+            ) + "\n"
+
+    def stats(self):
+        lookups = sum(self.counts.values())
+        return {
+            "segments": len(self._segments),
+            "reference_threshold": self.reference_threshold,
+            "lookups": lookups,
+            "matches": self.counts["match"],
+            "references": self.counts["reference"],
+            "misses": self.counts["miss"],
+            "hit_rate": round((self.counts["match"] + self.counts["reference"]) / lookups, 4) if lookups else 0.0,
+        }
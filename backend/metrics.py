@@ -0,0 +1,160 @@
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+
+# Gauges declare how values from several worker processes are combined when
+# PROMETHEUS_MULTIPROC_DIR is set (see gunicorn.conf.py); single-process serving ignores it.
+
+# Translation latencies range from cache hits (microseconds) to long documents (tens of seconds)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route and status code",
+    ["method", "path", "status_code"],
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Total handler time by route",
+    ["method", "path"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled",
+    ["path"],
+    multiprocess_mode="livesum",
+)
+
+TRANSLATIONS = Counter(
+    "translations_total",
+    "Translations by endpoint, model, language, source and status",
+    ["endpoint", "model", "language", "source", "status"],
+)
+TRANSLATION_LATENCY = Histogram(
+    "translation_duration_seconds",
+    "Time to produce one translation, including cache lookups and fallbacks",
+    ["endpoint", "model", "language", "source"],
+    buckets=LATENCY_BUCKETS,
+)
+INPUT_CHARACTERS = Counter(
+    "translation_input_characters_total",
+    "Characters submitted for translation",
+    ["endpoint", "language"],
+)
+OUTPUT_CHARACTERS = Counter(
+    "translation_output_characters_total",
+    "Characters returned as translations",
+    ["endpoint", "language", "source"],
+)
+FALLBACKS = Counter(
+    "translation_fallbacks_total",
+    "Translations served by the mock translator instead of Groq",
+    ["endpoint", "language"],
+)
+SOURCE_LANGUAGES = Counter(
+    "translation_source_languages_total",
+    "Detected language of submitted texts (unknown when the detector is not confident)",
+    ["language"],
+)
+TRANSLATION_MEMORY_LOOKUPS = Counter(
+    "translation_memory_lookups_total",
+    "Translation memory lookups by result: match (served), reference (passed to the prompt) or miss",
+    ["result"],
+)
+
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total",
+    "Requests shed by admission control, by HTTP status (429 rate limited, 503 queue full)",
+    ["status_code"],
+)
+ADMISSION_WAITING = Gauge(
+    "admission_waiting",
+    "Requests waiting for Groq rate-limit capacity",
+    multiprocess_mode="livesum",
+)
+
+CIRCUIT_STATE = Gauge(
+    "groq_circuit_breaker_state",
+    "Circuit breaker state per model: 0 closed, 1 half-open, 2 open",
+    ["model"],
+    multiprocess_mode="max",
+)
+
+MODEL_ROUTING = Counter(
+    "model_routing_decisions_total",
+    "Models picked for model=\"auto\" requests, by request size class",
+    ["model", "size"],
+)
+
+HEDGED_CALLS = Counter(
+    "hedged_calls_total",
+    "Hedged translation calls: hedged (second call sent), won / lost (the hedge answered first / second), "
+    "failed (both failed), skipped (hedge budget exhausted) and busy (no free Groq slot for a hedge)",
+    ["result"],
+)
+
+LIVE_SESSIONS = Gauge(
+    "live_translation_sessions",
+    "Open live-translation WebSocket sessions",
+    multiprocess_mode="livesum",
+)
+LIVE_SEGMENTS = Counter(
+    "live_translation_segments_total",
+    "Sentences of live-translation edits: translated (model call), reused (unchanged, no call) "
+    "and cancelled (edited again before their translation finished)",
+    ["result"],
+)
+
+GROQ_REQUESTS = Counter(
+    "groq_requests_total",
+    "Upstream Groq calls by model, operation and outcome",
+    ["model", "operation", "outcome"],
+)
+GROQ_LATENCY = Histogram(
+    "groq_request_duration_seconds",
+    "Upstream Groq call time, excluding time spent waiting for a concurrency slot",
+    ["model", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+GROQ_IN_FLIGHT = Gauge(
+    "groq_requests_in_flight",
+    "Upstream Groq calls currently in progress",
+    multiprocess_mode="livesum",
+)
+
+
+STARTUP_SECONDS = Gauge(
+    "server_startup_seconds",
+    "Start-up time by phase: import (loading server.py) and warmup (LLM stack and chains, until /ready)",
+    ["phase"],
+    multiprocess_mode="max",
+)
+
+
+def observe_translation(endpoint, result, text, duration):
+    """Record one translation response produced for `endpoint`"""
+    model = result.get("model_used", "none")
+    language = result.get("language", "none")
+    source = result.get("source", "none")
+    TRANSLATIONS.labels(endpoint, model, language, source, result.get("status", "error")).inc()
+    TRANSLATION_LATENCY.labels(endpoint, model, language, source).observe(duration)
+    INPUT_CHARACTERS.labels(endpoint, language).inc(len(text or ""))
+    if result.get("status") != "error":
+        OUTPUT_CHARACTERS.labels(endpoint, language, source).inc(len(result.get("output", "")))
+    if source == "mock_translator":
+        FALLBACKS.labels(endpoint, language).inc()
+
+
+def set_circuit_state(model, state):
+    CIRCUIT_STATE.labels(model).set({"closed": 0, "half_open": 1, "open": 2}[state])
+
+
+def render_metrics():
+    """Return the Prometheus text exposition and its content type, aggregated over all worker processes"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BatchParseError(ValueError):
+    """The model's answer to a batched prompt could not be split back into items"""
+
+
+def parse_batch_output(output, expected):
+    """Extract the JSON array of `expected` strings from a model answer"""
+    start, end = output.find("["), output.rfind("]")
+    if start == -1 or end < start:
+        raise BatchParseError("No JSON array in batched output")
+    try:
+        items = json.loads(output[start:end + 1])
+    except ValueError as e:
+        raise BatchParseError(f"Invalid JSON in batched output: {e}")
+    if not isinstance(items, list) or len(items) != expected or not all(isinstance(i, str) for i in items):
+        raise BatchParseError(f"Expected {expected} strings in batched output")
+    return items
+
+
+def parse_language_map(output, languages):
+    """Extract {language: translation} for the requested `languages` from a model answer.
+
+    Languages missing from the answer are left out, so callers can translate them separately.
+    """
+    start, end = output.find("{"), output.rfind("}")
+    if start == -1 or end < start:
+        raise BatchParseError("No JSON object in multi-language output")
+    try:
+        items = json.loads(output[start:end + 1])
+    except ValueError as e:
+        raise BatchParseError(f"Invalid JSON in multi-language output: {e}")
+    if not isinstance(items, dict):
+        raise BatchParseError("Expected a JSON object in multi-language output")
+    return {
+        language: items[language]
+        for language in languages
+        if isinstance(items.get(language), str) and items[language].strip()
+    }
+
+
+class MicroBatcher:
+    """Packs short requests for the same group into one prompt.
+
+    Requests for a group (e.g. a language and model) are collected for up to `window`
+    seconds or until `max_items` are waiting, then sent together with `run_batch(group, texts)`,
+    which returns one output per text. If that raises BatchParseError, every item is sent on
+    its own with `run_single(group, text)`.
+    """
+
+    def __init__(self, run_batch, run_single, window=0.02, max_items=16):
+        self.run_batch = run_batch
+        self.run_single = run_single
+        self.window = window
+        self.max_items = max_items
+        self._pending = {}
+        self._timers = {}
+        self._tasks = set()
+        self.batches = 0
+        self.batched_items = 0
+        self.fallbacks = 0
+
+    async def submit(self, group, text):
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(group, [])
+        pending.append((text, future))
+        if len(pending) >= self.max_items:
+            self._flush(group)
+        elif group not in self._timers:
+            self._timers[group] = asyncio.get_running_loop().call_later(self.window, self._flush, group)
+        return await future
+
+    def _flush(self, group):
+        timer = self._timers.pop(group, None)
+        if timer is not None:
+            timer.cancel()
+        items = [item for item in self._pending.pop(group, []) if not item[1].done()]
+        if not items:
+            return
+        task = asyncio.create_task(self._run(group, items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, group, items):
+        if len(items) == 1:
+            await self._run_single(group, *items[0])
+            return
+
+        self.batches += 1
+        self.batched_items += len(items)
+        try:
+            outputs = await self.run_batch(group, [text for text, _ in items])
+        except BatchParseError as e:
+            logger.warning(f"Micro-batch of {len(items)} fell back to single calls: {e}")
+            self.fallbacks += 1
+            await asyncio.gather(*(self._run_single(group, text, future) for text, future in items))
+            return
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), output in zip(items, outputs):
+            if not future.done():
+                future.set_result(output)
+
+    async def _run_single(self, group, text, future):
+        try:
+            output = await self.run_single(group, text)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(output)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+            "parse_fallbacks": self.fallbacks,
+        }
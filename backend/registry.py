@@ -0,0 +1,210 @@
+import logging
+
+# LangChain, langchain_groq and the Groq SDK take about a second to import, so they are imported
+# where they are used: importing the server stays fast and the stack loads in a background warm-up
+logger = logging.getLogger(__name__)
+
+# Bump whenever the prompt changes so cached translations from the old prompt are not reused
+PROMPT_VERSION = 1
+
+# System prompt used for every translation chain
+TRANSLATION_SYSTEM_PROMPT = (
+    "You are a professional translator. Translate the following text into {language}. "
+    "Provide only the translation without any additional text, explanations, or notes. "
+    "Ensure the translation is accurate and natural sounding:"
+)
+
+# System prompt for micro-batched requests; the user message is a JSON array of strings
+BATCH_TRANSLATION_SYSTEM_PROMPT = (
+    "You are a professional translator. The user message is a JSON array of texts. "
+    "Translate every text into {language}. Reply with only a JSON array of strings holding "
+    "the translations, in the same order and with exactly the same number of elements. "
+    "Do not add explanations or notes."
+)
+
+# System prompt for translating one text into several languages at once
+MULTI_TRANSLATION_SYSTEM_PROMPT = (
+    "You are a professional translator. Translate the user's text into each of these languages: "
+    "{languages}. Reply with only a JSON object whose keys are exactly these language names and "
+    "whose values are the translations. Do not add explanations or notes."
+)
+
+# System prompt used when the translation memory holds a similar, previously approved translation
+REFERENCE_TRANSLATION_SYSTEM_PROMPT = (
+    "You are a professional translator. Translate the following text into {language}. "
+    "Provide only the translation without any additional text, explanations, or notes. "
+    "A similar text was previously translated as shown below; reuse its terminology and style "
+    "where it applies, but translate the new text faithfully.\n"
+    "Similar text: {reference_source}\n"
+    "Its translation: {reference_target}"
+)
+
+
+def build_translation_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages([
+        ('system', TRANSLATION_SYSTEM_PROMPT),
+        ('user', '{text}')
+    ])
+
+
+def build_batch_translation_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages([
+        ('system', BATCH_TRANSLATION_SYSTEM_PROMPT),
+        ('user', '{items}')
+    ])
+
+
+def build_multi_translation_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages([
+        ('system', MULTI_TRANSLATION_SYSTEM_PROMPT),
+        ('user', '{text}')
+    ])
+
+
+def build_reference_translation_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages([
+        ('system', REFERENCE_TRANSLATION_SYSTEM_PROMPT),
+        ('user', '{text}')
+    ])
+
+
+def load_llm_stack(backend="groq"):
+    """Import the modules the chains for `backend` are built from; blocking, so run it in a thread"""
+    import httpx  # noqa: F401
+    import langchain_core.output_parsers  # noqa: F401
+    import langchain_core.prompts  # noqa: F401
+    if backend == "fake":
+        import fake_llm  # noqa: F401
+    else:
+        import groq  # noqa: F401
+        import langchain_groq  # noqa: F401
+
+
+class ChainRegistry:
+    """One reusable translation chain per model, built once and shared by all requests.
+
+    The HTTP connection pools live for the lifetime of the registry, so rebuilding the
+    chains after an API key or model list change keeps the warm connections to Groq.
+    With backend="fake" the chains run on FakeChatModel and need no API key.
+    """
+
+    def __init__(self, timeout=30, max_connections=16, backend="groq"):
+        self.backend = backend
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._http_client = None
+        self._async_http_client = None
+        self._config = None
+        self._models = {}
+        self._chains = {}
+        self._batch_chains = {}
+        self._multi_chains = {}
+        self._reference_chains = {}
+        self._probe_chain = None
+
+    def open(self):
+        """Create the shared keep-alive connection pools"""
+        import httpx
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+        if self._http_client is None:
+            self._http_client = httpx.Client(limits=limits, timeout=self.timeout)
+        if self._async_http_client is None:
+            self._async_http_client = httpx.AsyncClient(limits=limits, timeout=self.timeout)
+
+    async def aclose(self):
+        self.invalidate()
+        if self._async_http_client is not None:
+            await self._async_http_client.aclose()
+            self._async_http_client = None
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+
+    def invalidate(self):
+        """Drop every built chain; the next configure() call rebuilds them"""
+        self._config = None
+        self._models = {}
+        self._chains = {}
+        self._batch_chains = {}
+        self._multi_chains = {}
+        self._reference_chains = {}
+        self._probe_chain = None
+
+    def configure(self, api_key, models):
+        """Build the chains for `models`, unless they are already built for this key and list"""
+        config = (api_key, tuple(models))
+        if config == self._config:
+            return
+        self.invalidate()
+        self._config = config
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.prompts import ChatPromptTemplate
+        if self.backend == "fake":
+            from fake_llm import FakeChatModel
+            make_model = FakeChatModel.from_env
+        elif not api_key:
+            return
+        else:
+            import groq
+            from langchain_groq import ChatGroq
+            self.open()
+            # Retries are handled by the caller (see resilience.py), not by the Groq SDK
+            client_params = {"api_key": api_key, "timeout": self.timeout, "max_retries": 0}
+            client = groq.Groq(http_client=self._http_client, **client_params).chat.completions
+            async_client = groq.AsyncGroq(http_client=self._async_http_client, **client_params).chat.completions
+
+            def make_model(name):
+                return ChatGroq(
+                    model=name,
+                    groq_api_key=api_key,
+                    timeout=self.timeout,
+                    client=client,
+                    async_client=async_client,
+                )
+
+        prompt = build_translation_prompt()
+        batch_prompt = build_batch_translation_prompt()
+        multi_prompt = build_multi_translation_prompt()
+        reference_prompt = build_reference_translation_prompt()
+        for name in models:
+            model = make_model(name)
+            self._models[name] = model
+            self._chains[name] = prompt | model | StrOutputParser()
+            self._batch_chains[name] = batch_prompt | model | StrOutputParser()
+            self._multi_chains[name] = multi_prompt | model | StrOutputParser()
+            self._reference_chains[name] = reference_prompt | model | StrOutputParser()
+        if models:
+            probe_prompt = ChatPromptTemplate.from_template("Say hello in French")
+            self._probe_chain = probe_prompt | self._models[models[0]] | StrOutputParser()
+        logger.info(f"Chain registry built for {self.backend} models: {', '.join(models)}")
+
+    def get(self, model):
+        """Return the translation chain for `model`, or None when Groq is not configured"""
+        return self._chains.get(model)
+
+    def get_batch(self, model):
+        """Return the chain translating a JSON array of texts for `model`, or None"""
+        return self._batch_chains.get(model)
+
+    def get_multi(self, model):
+        """Return the chain translating one text into a list of languages as a JSON object, or None"""
+        return self._multi_chains.get(model)
+
+    def get_reference(self, model):
+        """Return the chain translating a text with a similar translated example for `model`, or None"""
+        return self._reference_chains.get(model)
+
+    def get_model(self, model):
+        """Return the bare chat model for `model`, or None when Groq is not configured"""
+        return self._models.get(model)
+
+    def get_probe_chain(self):
+        """Return a tiny chain on the first model, used to check that Groq answers"""
+        return self._probe_chain
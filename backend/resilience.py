@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import random
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upstream errors worth another attempt: connection problems, timeouts, rate limits and 5xx.
+# The Groq SDK and httpx are loaded lazily (see registry.load_llm_stack); their errors can
+# only have been raised once they are imported, so they are looked up in sys.modules.
+GROQ_RETRYABLE_ERRORS = ("APIConnectionError", "RateLimitError", "InternalServerError")
+
+
+def retryable_errors():
+    errors = [asyncio.TimeoutError]
+    groq = sys.modules.get("groq")
+    if groq is not None:
+        errors.extend(getattr(groq, name) for name in GROQ_RETRYABLE_ERRORS)
+    httpx = sys.modules.get("httpx")
+    if httpx is not None:
+        errors.append(httpx.TransportError)
+    return tuple(errors)
+
+
+def is_retryable(exc):
+    return isinstance(exc, retryable_errors()) or getattr(exc, "retryable", False)
+
+
+class CircuitOpenError(RuntimeError):
+    """The model's circuit breaker is open; the call was not attempted"""
+
+    def __init__(self, model, retry_after):
+        super().__init__(f"Circuit breaker open for {model}, retry in {retry_after:.0f}s")
+        self.model = model
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Per-model circuit breaker.
+
+    After `failure_threshold` consecutive failures the breaker opens and calls fail
+    immediately for `reset_timeout` seconds. Then one trial call is let through
+    (half-open): success closes the breaker, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, model, failure_threshold=5, reset_timeout=30.0, on_change=None):
+        self.model = model
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.warning(f"Circuit breaker for {self.model}: {self.state} -> {state}")
+            self.state = state
+            if self.on_change is not None:
+                self.on_change(self.model, state)
+
+    def allows_call(self):
+        """Whether before_call() would let a call through now; unlike it, never changes state"""
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.reset_timeout
+        if self.state == self.HALF_OPEN:
+            return not self._trial_in_flight
+        return True
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go upstream now"""
+        if self.state == self.OPEN:
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.reset_timeout:
+                raise CircuitOpenError(self.model, self.reset_timeout - elapsed)
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                raise CircuitOpenError(self.model, 1)
+            self._trial_in_flight = True
+
+    def release(self):
+        """Forget an unfinished trial call (e.g. cancelled) without changing state"""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self._trial_in_flight = False
+        self.failures = 0
+        self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        self._trial_in_flight = False
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def snapshot(self):
+        snapshot = {"state": self.state, "consecutive_failures": self.failures}
+        if self.state == self.OPEN:
+            snapshot["retry_in_seconds"] = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+        return snapshot
+
+
+class ResilientCaller:
+    """Retries retryable upstream errors with full-jitter exponential backoff, behind per-model breakers.
+
+    No retry is started once `deadline` seconds have passed since the first attempt, so a
+    slow outage costs at most about one extra attempt rather than `attempts` timeouts.
+    """
+
+    def __init__(self, attempts=3, base_delay=0.25, max_delay=4.0, deadline=30.0,
+                 failure_threshold=5, reset_timeout=30.0, on_change=None):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+        self._breakers = {}
+        self.retries = 0
+
+    def breaker(self, model):
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = CircuitBreaker(
+                model, self.failure_threshold, self.reset_timeout, self.on_change
+            )
+        return breaker
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def call(self, model, fn):
+        """Return `await fn()`, retrying and tripping the model's breaker as needed"""
+        breaker = self.breaker(model)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            breaker.before_call()
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                if is_retryable(e):
+                    breaker.record_failure()
+                else:
+                    # Groq answered (e.g. a 4xx for this request), so it is not down
+                    breaker.record_success()
+                attempt += 1
+                delay = self.backoff(attempt)
+                if (
+                    not is_retryable(e)
+                    or attempt >= self.attempts
+                    or time.monotonic() - started + delay > self.deadline
+                ):
+                    raise
+                self.retries += 1
+                logger.info(f"Retrying {model} after {type(e).__name__} (attempt {attempt + 1}) in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            else:
+                breaker.record_success()
+                return result
+
+    def snapshot(self):
+        return {model: breaker.snapshot() for model, breaker in self._breakers.items()}
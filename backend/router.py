@@ -0,0 +1,156 @@
+import random
+import time
+
+SHORT = "short"
+LONG = "long"
+
+
+class ModelStats:
+    """Exponentially weighted moving averages of one model's latency and error rate.
+
+    Latency is tracked per size class, since the model that answers short strings fastest
+    is not necessarily the one with the best throughput on long text. Failed calls only
+    update the error rate, which halves every `error_half_life` seconds without calls: a
+    model avoided after an outage is otherwise never called again to show it recovered.
+    """
+
+    def __init__(self, alpha, error_half_life=30.0):
+        self.alpha = alpha
+        self.error_half_life = error_half_life
+        self.latency = {SHORT: None, LONG: None}
+        self.error_rate = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.updated_at = None
+
+    def _average(self, previous, value):
+        return value if previous is None else previous + self.alpha * (value - previous)
+
+    def current_error_rate(self, now=None):
+        """The error rate, decayed for the time since the last call"""
+        if self.updated_at is None or not self.error_half_life:
+            return self.error_rate
+        idle = max(0.0, (now or time.time()) - self.updated_at)
+        return self.error_rate * 0.5 ** (idle / self.error_half_life)
+
+    def observe(self, size, latency, ok):
+        self.calls += 1
+        previous = self.current_error_rate() if self.calls > 1 else None
+        self.updated_at = time.time()
+        self.error_rate = self._average(previous, 0.0 if ok else 1.0)
+        if ok:
+            self.latency[size] = self._average(self.latency[size], latency)
+        else:
+            self.errors += 1
+
+    def expected_latency(self, size):
+        """Expected latency for a request of `size`, or None before any successful call"""
+        latency = self.latency[size]
+        return latency if latency is not None else self.latency[LONG if size == SHORT else SHORT]
+
+    def snapshot(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.current_error_rate(), 4),
+            "latency_ms": {size: round(value * 1000, 1) if value is not None else None
+                           for size, value in self.latency.items()},
+            "updated_at": self.updated_at,
+        }
+
+
+class ModelRouter:
+    """Picks a model per request for `model="auto"`.
+
+    Candidates are the models whose context window (`context_tokens`, default
+    `default_context`) fits the request, that support the target language (`languages` maps
+    a model to the languages it may serve; unlisted models serve all) and that
+    `is_available(model)`, e.g. whose circuit breaker is not open. The candidate with the
+    lowest expected latency for the request's size class wins, its EWMA latency inflated by
+    `error_penalty` times its EWMA error rate; models with an error rate at or above
+    `max_error_rate` are only used when nothing else is left. A model's error rate halves
+    every `error_half_life` seconds without calls, so a model left alone after failing, and
+    whose breaker lets a trial call through again, is picked again.
+
+    Models without observations are tried first, and with probability `explore` a random
+    candidate is picked so that the stats of models not currently winning stay fresh.
+    """
+
+    def __init__(self, models, context_tokens=None, languages=None, short_tokens=64, alpha=0.2,
+                 explore=0.05, error_penalty=4.0, max_error_rate=0.5, error_half_life=30.0, default_context=8192,
+                 is_available=None):
+        self.models = list(models)
+        self.context_tokens = context_tokens or {}
+        self.languages = {model: set(names) for model, names in (languages or {}).items()}
+        self.short_tokens = short_tokens
+        self.explore = explore
+        self.error_penalty = error_penalty
+        self.max_error_rate = max_error_rate
+        self.default_context = default_context
+        self.is_available = is_available
+        self.stats = {model: ModelStats(alpha, error_half_life) for model in self.models}
+        self.decisions = {model: 0 for model in self.models}
+
+    def size_class(self, tokens):
+        return SHORT if tokens <= self.short_tokens else LONG
+
+    def context(self, model):
+        return self.context_tokens.get(model, self.default_context)
+
+    def _score(self, model, size):
+        stats = self.stats[model]
+        latency = stats.expected_latency(size)
+        if latency is None:
+            return -1.0  # never answered: try it
+        return latency * (1 + self.error_penalty * stats.current_error_rate())
+
+    def serves(self, model, languages):
+        return model not in self.languages or self.languages[model].issuperset(languages)
+
+    def choose(self, tokens, languages=(), context=None, exclude=()):
+        """Return the model for a text of `tokens` tokens into `languages`, needing `context` tokens in all.
+
+        Models in `exclude` are only picked when there is no other.
+        """
+        size = self.size_class(tokens)
+        context = tokens if context is None else context
+        models = [model for model in self.models if model not in exclude] or self.models
+        fitting = [model for model in models if self.context(model) >= context]
+        if not fitting:
+            # Nothing holds the request in one prompt; the largest context needs the fewest chunks
+            fitting = [max(models, key=self.context)]
+        candidates = [model for model in fitting if self.serves(model, languages)]
+        candidates = candidates or fitting
+        if self.is_available is not None:
+            candidates = [model for model in candidates if self.is_available(model)] or candidates
+        candidates = [model for model in candidates
+                      if self.stats[model].current_error_rate() < self.max_error_rate] or candidates
+
+        if len(candidates) > 1 and random.random() < self.explore:
+            model = random.choice(candidates)
+        else:
+            model = min(candidates, key=lambda name: self._score(name, size))
+        self.decisions[model] += 1
+        return model
+
+    def observe(self, model, tokens, latency, ok):
+        """Record one finished call of `model`"""
+        stats = self.stats.get(model)
+        if stats is not None:
+            stats.observe(self.size_class(tokens), latency, ok)
+
+    def snapshot(self):
+        return {
+            "short_tokens": self.short_tokens,
+            "explore": self.explore,
+            "models": {
+                model: {
+                    **self.stats[model].snapshot(),
+                    "context_tokens": self.context(model),
+                    "languages": sorted(self.languages[model]) if model in self.languages else "all",
+                    "available": self.is_available(model) if self.is_available is not None else True,
+                    "routed": self.decisions[model],
+                }
+                for model in self.models
+            },
+        }
@@ -1,13 +1,37 @@
-from fastapi import FastAPI, HTTPException
+import time
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, File, HTTPException, Request, Response, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-from langchain_groq import ChatGroq
+from fastapi.responses import JSONResponse, StreamingResponse
+import asyncio
+import json
+from collections import deque
 import os
+import re
+import tempfile
 from dotenv import load_dotenv
 import logging
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional, Union
+from registry import ChainRegistry, PROMPT_VERSION, load_llm_stack
+from cache import TranslationCache, make_cache_key
+from health import HealthProbe, Warmup
+from chunking import estimate_tokens, reassemble, segment
+from detection import SAMPLE_CHARS, detect_language
+from singleflight import SingleFlight
+from microbatch import MicroBatcher, parse_batch_output, parse_language_map
+from admission import AdmissionController, AdmissionRejected, SharedBucketStore
+from resilience import ResilientCaller, is_retryable
+from router import ModelRouter
+from hedge import Hedger
+from files import FILE_FORMATS, detect_format, open_file, take
+from jobs import JobRunner, JobStore
+from live import LiveSession
+from memory import TranslationMemory, parse_bilingual
+from tts import AudioCache, audio_id, parse_range, read_audio, synthesize
+from starlette.routing import Match
+import metrics
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -30,10 +54,236 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# List of available Groq models
-WORKING_MODEL = [ 
-    "gemma2-9b-it",
-]
+def route_path(scope):
+    """Route template for a request (e.g. /cache/stats), keeping metric label cardinality bounded"""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "other"
+
+class HTTPMetricsMiddleware:
+    """Record request counts, latency and in-flight requests for every route.
+
+    A plain ASGI middleware: a request is finished when the last body message is sent, so streamed
+    responses (/translate/stream, /translate/file) are timed to their end, not to their headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path = route_path(scope)
+        in_flight = metrics.HTTP_IN_FLIGHT.labels(path)
+        in_flight.inc()
+        started = time.perf_counter()
+        status_code = 500
+        finished = False
+        
+        def finish():
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            in_flight.dec()
+            metrics.HTTP_LATENCY.labels(scope["method"], path).observe(time.perf_counter() - started)
+            metrics.HTTP_REQUESTS.labels(scope["method"], path, str(status_code)).inc()
+        
+        async def send_and_record(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+        
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            # Errors and client disconnects end the request without a final body message
+            finish()
+
+app.add_middleware(HTTPMetricsMiddleware)
+
+# Shed load explicitly instead of turning overload into mock translations
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    metrics.ADMISSION_REJECTIONS.labels(str(exc.status_code)).inc()
+    return JSONResponse(
+        status_code=exc.status_code,
+        headers={"Retry-After": str(exc.retry_after)},
+        content={
+            "output": f"Error: {exc.message}",
+            "status": "error",
+            "message": exc.message,
+            "model_used": "none",
+            "source": "admission",
+            "retry_after": exc.retry_after
+        }
+    )
+
+# List of available Groq models, e.g. GROQ_MODELS=gemma2-9b-it,llama-3.1-8b-instant
+WORKING_MODEL = [name.strip() for name in os.getenv("GROQ_MODELS", "gemma2-9b-it").split(",") if name.strip()]
+
+# Model used when a request names none; "auto" lets the router pick one per request
+DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", WORKING_MODEL[0])
+
+# Context windows in tokens of known Groq models, extended or overridden with
+# MODEL_CONTEXT_TOKENS='{"model": tokens}'; unknown models are assumed to have 8192
+MODEL_CONTEXT_TOKENS = {
+    "gemma2-9b-it": 8192,
+    "llama-3.1-8b-instant": 131072,
+    "llama-3.3-70b-versatile": 131072,
+    **json.loads(os.getenv("MODEL_CONTEXT_TOKENS", "{}")),
+}
+
+# Maximum number of Groq calls in flight at once per worker process
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "16"))
+groq_semaphore = asyncio.Semaphore(GROQ_MAX_CONCURRENCY)
+
+# Timeout in seconds for a single Groq call
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "30"))
+
+# "groq" for the real API, or "fake" to run on FakeChatModel for offline benchmarks
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+
+# Chains are built once at startup and reused; connection pools stay warm between requests
+chain_registry = ChainRegistry(timeout=GROQ_TIMEOUT, max_connections=GROQ_MAX_CONCURRENCY, backend=LLM_BACKEND)
+
+# Translation cache: in-process LRU tier plus an optional SQLite tier that survives restarts
+# and is shared by worker processes; purges reach the other workers' LRU tiers within CACHE_SYNC_INTERVAL
+translation_cache = TranslationCache(
+    max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "10000")),
+    ttl=float(os.getenv("CACHE_TTL", "86400")),
+    db_path=os.getenv("CACHE_DB_PATH") or None,
+    sync_interval=float(os.getenv("CACHE_SYNC_INTERVAL", "1")),
+)
+
+# Translation memory: approved translations found by similarity, seeded through /memory/import.
+# Translations of the same text (up to casing and punctuation) are served directly; similar ones are only
+# shown to the model as an example, since near-duplicates may differ in a number or a negation.
+TM_DB_PATH = os.getenv("TM_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "translation_memory.db"))
+TM_LEARN = os.getenv("TM_LEARN", "false").lower() in ("1", "true", "yes")
+translation_memory = TranslationMemory(
+    TM_DB_PATH,
+    reference_threshold=float(os.getenv("TM_REFERENCE_THRESHOLD", "0.6")),
+    sync_interval=float(os.getenv("TM_SYNC_INTERVAL", "5")),
+) if TM_DB_PATH else None
+
+# Bulk translation jobs: persisted in SQLite and drained by a background worker pool
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "jobs.db"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_ITEM_CONCURRENCY = int(os.getenv("JOB_ITEM_CONCURRENCY", "4"))
+JOB_MAX_ITEMS = int(os.getenv("JOB_MAX_ITEMS", "100000"))
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "168"))
+
+# File translation: fields translated concurrently, with at most FILE_WINDOW_RECORDS records
+# read ahead of the output so memory use does not grow with the file
+FILE_MAX_CONCURRENCY = int(os.getenv("FILE_MAX_CONCURRENCY", "8"))
+FILE_WINDOW_RECORDS = int(os.getenv("FILE_WINDOW_RECORDS", "256"))
+FILE_READ_BATCH = 64
+
+# Groq is probed in the background; /check_groq only reports the last result
+GROQ_PROBE_INTERVAL = float(os.getenv("GROQ_PROBE_INTERVAL", "60"))
+
+# Texts longer than CHUNK_MAX_TOKENS are split into chunks translated concurrently
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "800"))
+CHUNK_MAX_CONCURRENCY = int(os.getenv("CHUNK_MAX_CONCURRENCY", "8"))
+
+# Fan-out to several languages uses one multi-language prompt for texts up to this length
+MULTI_PROMPT_MAX_CHARS = int(os.getenv("MULTI_PROMPT_MAX_CHARS", "300"))
+
+# Texts detected (offline, see detection.py) as already being in the target language are returned
+# unchanged when the detector is at least this confident; 0 turns the shortcut off
+DETECTION_SKIP_CONFIDENCE = float(os.getenv("DETECTION_SKIP_CONFIDENCE", "0.9"))
+
+# Live translation (WebSocket): an edit is applied once no other followed for LIVE_DEBOUNCE_MS
+LIVE_DEBOUNCE_MS = float(os.getenv("LIVE_DEBOUNCE_MS", "300"))
+LIVE_MAX_CHARS = int(os.getenv("LIVE_MAX_CHARS", "20000"))
+LIVE_CONCURRENCY = int(os.getenv("LIVE_CONCURRENCY", "4"))
+LIVE_MAX_SENTENCES = int(os.getenv("LIVE_MAX_SENTENCES", "1000"))
+
+# Batch translation limits
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+# Identical translations already in flight are awaited instead of sent to Groq again
+translation_flight = SingleFlight()
+
+# Opt-in micro-batching: short requests for the same language and model share one prompt
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+MICROBATCH_WINDOW_MS = float(os.getenv("MICROBATCH_WINDOW_MS", "20"))
+MICROBATCH_MAX_ITEMS = int(os.getenv("MICROBATCH_MAX_ITEMS", "16"))
+MICROBATCH_MAX_CHARS = int(os.getenv("MICROBATCH_MAX_CHARS", "200"))
+
+# Admission control in front of Groq: per-model requests/tokens per minute (0 = unlimited),
+# e.g. ADMISSION_LIMITS='{"gemma2-9b-it": {"rpm": 30, "tpm": 15000}}'.
+# With ADMISSION_DB_PATH the budgets are shared by every worker process using that file.
+ADMISSION_DB_PATH = os.getenv("ADMISSION_DB_PATH") or None
+admission_store = SharedBucketStore(ADMISSION_DB_PATH) if ADMISSION_DB_PATH else None
+admission = AdmissionController(
+    default_rpm=int(os.getenv("ADMISSION_RPM", "0")),
+    default_tpm=int(os.getenv("ADMISSION_TPM", "0")),
+    limits=json.loads(os.getenv("ADMISSION_LIMITS", "{}")),
+    max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "100")),
+    max_wait=float(os.getenv("ADMISSION_MAX_WAIT", "10")),
+    store=admission_store,
+    on_wait=metrics.ADMISSION_WAITING.inc,
+)
+
+# Retries with jittered backoff for transient Groq errors, and a per-model circuit breaker
+resilient_caller = ResilientCaller(
+    attempts=int(os.getenv("GROQ_RETRY_ATTEMPTS", "3")),
+    base_delay=float(os.getenv("GROQ_RETRY_BASE_DELAY", "0.25")),
+    max_delay=float(os.getenv("GROQ_RETRY_MAX_DELAY", "4")),
+    deadline=GROQ_TIMEOUT,
+    failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("BREAKER_RESET_TIMEOUT", "30")),
+    on_change=metrics.set_circuit_state,
+)
+
+# Tokens of system prompt added to every translation request
+PROMPT_OVERHEAD_TOKENS = 60
+
+# model="auto": routes each request by its size and target language to the model with the lowest
+# expected latency, from EWMAs of every model's observed latency and error rate. Models can be
+# limited to some languages with MODEL_LANGUAGES='{"model": ["French", ...]}'.
+model_router = ModelRouter(
+    WORKING_MODEL,
+    context_tokens=MODEL_CONTEXT_TOKENS,
+    languages=json.loads(os.getenv("MODEL_LANGUAGES", "{}")),
+    short_tokens=int(os.getenv("ROUTER_SHORT_TOKENS", "64")),
+    alpha=float(os.getenv("ROUTER_EWMA_ALPHA", "0.2")),
+    explore=float(os.getenv("ROUTER_EXPLORE", "0.05")),
+    error_half_life=float(os.getenv("BREAKER_RESET_TIMEOUT", "30")),
+    is_available=lambda model: resilient_caller.breaker(model).allows_call(),
+)
+
+# Opt-in hedged requests: a translation call still running at the HEDGE_PERCENTILE latency of recent
+# calls of its model and size gets a second call, and the first answer wins. The hedge goes to the
+# same model, to HEDGE_MODEL, or with HEDGE_MODEL=auto to the router's best other model. Hedges
+# are capped at HEDGE_BUDGET extra calls per call.
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+HEDGE_MODEL = os.getenv("HEDGE_MODEL", "")
+if HEDGE_MODEL and HEDGE_MODEL != "auto" and HEDGE_MODEL not in WORKING_MODEL:
+    raise ValueError(f"HEDGE_MODEL '{HEDGE_MODEL}' is not in GROQ_MODELS")
+hedger = Hedger(
+    percentile=float(os.getenv("HEDGE_PERCENTILE", "95")),
+    budget=float(os.getenv("HEDGE_BUDGET", "0.05")),
+    min_samples=int(os.getenv("HEDGE_MIN_SAMPLES", "20")),
+    min_delay=float(os.getenv("HEDGE_MIN_DELAY_MS", "50")) / 1000,
+    on_result=lambda result: metrics.HEDGED_CALLS.labels(result).inc(),
+) if HEDGE_ENABLED else None
+
+# Text-to-speech: MP3s are stored on disk under their content hash, with an LRU size cap
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "robotranslate-tts"))
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "200"))
+TTS_MAX_CHARS = int(os.getenv("TTS_MAX_CHARS", "5000"))
+audio_cache = AudioCache(TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_MB * 1024 * 1024)
+speech_flight = SingleFlight()
 
 # Language mapping with emojis
 LANGUAGE_MAP = {
@@ -54,49 +304,234 @@ LANGUAGE_MAP = {
     "Greek": {"code": "el", "emoji": "🇬🇷"}
 }
 
+async def probe_groq():
+    """Make a tiny real Groq call; raises when Groq is unreachable or misconfigured"""
+    get_chain(WORKING_MODEL[0])
+    chain = chain_registry.get_probe_chain()
+    if chain is None:
+        raise RuntimeError("GROQ_API_KEY not found in environment variables")
+    await invoke_chain(chain, {}, model=WORKING_MODEL[0], operation="probe")
+
+groq_probe = HealthProbe(probe_groq, interval=GROQ_PROBE_INTERVAL)
+
+async def warm_up():
+    """Import the LLM stack off the event loop, build the chains, then start the work that uses them"""
+    await asyncio.to_thread(load_llm_stack, LLM_BACKEND)
+    chain_registry.open()
+    chain_registry.configure(os.getenv("GROQ_API_KEY"), WORKING_MODEL)
+    groq_probe.start()
+    await job_runner.start()
+
+# The port opens (and /healthz answers) while the LLM stack loads; /ready reports when it is done.
+# Requests arriving earlier are still served, loading what they need inline.
+warmup = Warmup(warm_up, on_ready=metrics.STARTUP_SECONDS.labels("warmup").set)
+
+# SQLite stores are connected per worker process, after gunicorn has forked the preloaded app
+@app.on_event("startup")
+async def open_stores():
+    translation_cache.open()
+    job_store.open()
+    if translation_memory is not None:
+        await translation_memory.open()
+    if admission_store is not None:
+        admission_store.open()
+
+@app.on_event("startup")
+async def build_chain_registry():
+    warmup.start()
+
+@app.on_event("shutdown")
+async def close_chain_registry():
+    await warmup.stop()
+    await job_runner.stop()
+    await groq_probe.stop()
+    await chain_registry.aclose()
+
+@app.on_event("shutdown")
+async def close_stores():
+    job_store.close()
+    translation_cache.close()
+    if translation_memory is not None:
+        await translation_memory.aclose()
+    if admission_store is not None:
+        admission_store.close()
+
+def get_chain(model):
+    """Look up the chain for `model`, rebuilding the registry if the API key or model list changed"""
+    chain_registry.configure(os.getenv("GROQ_API_KEY"), WORKING_MODEL)
+    return chain_registry.get(model)
+
+def estimate_request_tokens(text):
+    """Tokens a translation request uses: the text, a translation of similar length, and the prompt"""
+    return 2 * estimate_tokens(text) + PROMPT_OVERHEAD_TOKENS
+
+def input_tokens(inputs):
+    """Estimated tokens of the text in a chain's inputs"""
+    return estimate_tokens(inputs.get("text") or inputs.get("items") or "")
+
+async def invoke_chain_once(chain, inputs, model, operation, on_start=None):
+    """Make one chain call, bounded by GROQ_MAX_CONCURRENCY; `on_start()` is called once it holds a slot"""
+    async with groq_semaphore:
+        if on_start is not None:
+            on_start()
+        metrics.GROQ_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await chain.ainvoke(inputs)
+            outcome = "success"
+            return result
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            metrics.GROQ_IN_FLIGHT.dec()
+            metrics.GROQ_LATENCY.labels(model, operation).observe(duration)
+            metrics.GROQ_REQUESTS.labels(model, operation, outcome).inc()
+            if outcome != "cancelled":
+                model_router.observe(model, input_tokens(inputs), duration, outcome == "success")
+            # A cancelled call (e.g. a hedge that lost) still ran at least this long
+            if hedger is not None and operation == "translate" and outcome != "error":
+                hedger.observe((model, model_router.size_class(input_tokens(inputs))), duration)
+
+async def invoke_chain(chain, inputs, model="unknown", operation="translate", on_start=None):
+    """Run a chain asynchronously, retrying transient errors behind the model's circuit breaker"""
+    if operation == "probe":
+        # The health probe reports on Groq directly, independent of breaker state
+        return await invoke_chain_once(chain, inputs, model, operation)
+    return await resilient_caller.call(model, lambda: invoke_chain_once(chain, inputs, model, operation, on_start))
+
+async def stream_chain(chain, inputs, model="unknown"):
+    """Stream chain output chunks, holding one GROQ_MAX_CONCURRENCY slot for the whole stream"""
+    breaker = resilient_caller.breaker(model)
+    breaker.before_call()
+    async with groq_semaphore:
+        metrics.GROQ_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            async for chunk in chain.astream(inputs):
+                yield chunk
+            outcome = "success"
+            breaker.record_success()
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            if is_retryable(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        finally:
+            if outcome != "success":
+                breaker.release()
+            duration = time.perf_counter() - started
+            metrics.GROQ_IN_FLIGHT.dec()
+            metrics.GROQ_LATENCY.labels(model, "stream").observe(duration)
+            metrics.GROQ_REQUESTS.labels(model, "stream", outcome).inc()
+            if outcome != "cancelled":
+                model_router.observe(model, input_tokens(inputs), duration, outcome == "success")
+
+async def run_micro_batch(group, texts):
+    language, model = group
+    chain = chain_registry.get_batch(model)
+    inputs = {"language": language, "items": json.dumps(texts, ensure_ascii=False)}
+    output = await invoke_chain(chain, inputs, model=model, operation="micro_batch")
+    return parse_batch_output(output, len(texts))
+
+async def run_micro_batch_single(group, text):
+    language, model = group
+    return await invoke_chain(chain_registry.get(model), {"language": language, "text": text}, model=model)
+
+micro_batcher = MicroBatcher(
+    run_micro_batch,
+    run_micro_batch_single,
+    window=MICROBATCH_WINDOW_MS / 1000,
+    max_items=MICROBATCH_MAX_ITEMS,
+) if MICROBATCH_ENABLED else None
+
 # Health check endpoint
 @app.get("/")
 async def health_check():
     return {"status": "ok", "message": "Translation server is running"}
 
-# Get available models
+# Liveness: the process is up and its event loop responds
+@app.get("/healthz")
+async def liveness():
+    return {"status": "ok"}
+
+# Readiness: the LLM stack is loaded and the chain registry is built
+@app.get("/ready")
+async def readiness():
+    startup = {"import_seconds": round(IMPORT_SECONDS, 3), **warmup.snapshot()}
+    if warmup.ready:
+        return {"status": "ready", **startup}
+    if warmup.error is not None:
+        return JSONResponse(status_code=503, content={"status": "error", "message": f"Warm-up failed: {warmup.error}", **startup})
+    return JSONResponse(status_code=503, content={"status": "warming", "message": "Loading the translation models", **startup})
+
+# Detect the language a text is written in, without calling the model
+class DetectionRequest(BaseModel):
+    text: str
+
+@app.post("/detect")
+async def detect(request: DetectionRequest):
+    detection = detect_language(request.text)
+    language = detection["language"]
+    return {**detection, "code": LANGUAGE_MAP[language]["code"] if language else None}
+
+# Get available models; "auto" routes each request to one of them
 @app.get("/models")
 async def get_models():
-    return {"models": WORKING_MODEL}
+    return {"models": WORKING_MODEL + ["auto"], "default": DEFAULT_MODEL}
+
+# Per-model latency and error-rate averages behind model="auto", and hedged request counters
+@app.get("/models/stats")
+async def model_stats():
+    stats = model_router.snapshot()
+    if hedger is not None:
+        stats["hedging"] = hedger.stats()
+    return stats
 
 # Get available languages
 @app.get("/languages")
 async def get_languages():
     return {"languages": list(LANGUAGE_MAP.keys())}
 
-# Check if Groq API key is available
+# Report the last background Groq probe, breaker states and admission queues; never calls the model inline
 @app.get("/check_groq")
 async def check_groq():
     groq_api_key = os.getenv("GROQ_API_KEY")
-    if not groq_api_key:
+    if not groq_api_key and LLM_BACKEND == "groq":
         return {"status": "error", "message": "GROQ_API_KEY not found in environment variables"}
     
-    try:
-        test_model = ChatGroq(model="gemma2-9b-it", groq_api_key=groq_api_key, timeout=10)
-        prompt = ChatPromptTemplate.from_template("Say hello in French")
-        chain = prompt | test_model | StrOutputParser()
-        result = chain.invoke({})
+    health = {**groq_probe.snapshot(), "circuit_breakers": resilient_caller.snapshot(), "admission": admission.stats()}
+    if health["ok"] is None:
+        return {
+            "status": "pending",
+            "message": "Groq API probe has not completed yet",
+            **health,
+        }
+    if health["ok"]:
         return {
             "status": "success", 
             "message": "Groq API is working",
             "working_model": WORKING_MODEL,
+            **health,
         }
-    except Exception as e:
-        return {
-            "status": "error", 
-            "message": f"Groq API test failed: {str(e)}",
-        }
+    return {
+        "status": "error", 
+        "message": f"Groq API test failed: {health['error']}",
+        **health,
+    }
 
 # Translation request model
 class TranslationRequest(BaseModel):
     text: str
     language: str
-    model: Optional[str] = "gemma2-9b-it"
+    model: Optional[str] = None
 
 # Mock translator for fallback
 def mock_translator(text, language):
@@ -120,13 +555,9 @@ def mock_translator(text, language):
     }
     return translations.get(language, f"Translation to {language}: {text}")
 
-# Main translation endpoint
-@app.post("/translate")
-async def translate_text(request: TranslationRequest):
-    groq_api_key = os.getenv("GROQ_API_KEY")
-    
-    # Validate input
-    if not request.text or not request.text.strip():
+def validate_translation(text, language):
+    """Return a validation error response, or None when the text and language are acceptable"""
+    if not text or not text.strip():
         return {
             "output": "Error: Text is required",
             "status": "error", 
@@ -135,57 +566,300 @@ async def translate_text(request: TranslationRequest):
             "source": "validation"
         }
     
-    if request.language not in LANGUAGE_MAP:
+    if language not in LANGUAGE_MAP:
         return {
-            "output": f"Error: Language '{request.language}' not supported",
+            "output": f"Error: Language '{language}' not supported",
             "status": "error", 
-            "message": f"Language '{request.language}' not supported",
+            "message": f"Language '{language}' not supported",
             "model_used": "none",
             "source": "validation"
         }
     
-    # Validate model selection
-    if request.model not in WORKING_MODEL:
-        request.model = "gemma2-9b-it"
+    return None
+
+def detect_source_language(text):
+    """Detect the language `text` is written in; returns the response fields reporting it"""
+    detection = detect_language(text)
+    metrics.SOURCE_LANGUAGES.labels(detection["language"] or "unknown").inc()
+    return {"detected_language": detection["language"], "detection_confidence": detection["confidence"]}
+
+def unchanged_translation(text, language, detected):
+    """Response returning `text` as is when it is confidently already in `language`, else None.
+
+    Detection only reads the first SAMPLE_CHARS characters, so longer texts are always translated.
+    """
+    if (not DETECTION_SKIP_CONFIDENCE or len(text) > SAMPLE_CHARS
+            or detected["detected_language"] != language
+            or detected["detection_confidence"] < DETECTION_SKIP_CONFIDENCE):
+        return None
+    return {
+        "output": text,
+        "status": "success",
+        "model_used": "none",
+        "language": language,
+        "source": "detection",
+        "message": f"Text is already in {language}",
+        **detected
+    }
+
+def validate_model(model):
+    """Return a validation error response unless `model` is a working model or "auto" """
+    if model == "auto" or model in WORKING_MODEL:
+        return None
+    return {
+        "output": f"Error: Model '{model}' not supported",
+        "status": "error",
+        "message": f"Model '{model}' not supported, expected one of: {', '.join(WORKING_MODEL + ['auto'])}",
+        "model_used": "none",
+        "source": "validation"
+    }
+
+def resolve_model(model, text, languages):
+    """The model to call for a validated `model`: itself, or the router's pick when it is "auto".
+
+    The chosen model has to fit `text` and its translations into `languages` in one prompt;
+    long documents are sent in chunks of up to CHUNK_MAX_TOKENS.
+    """
+    if model != "auto":
+        return model
+    tokens = min(estimate_tokens(text), CHUNK_MAX_TOKENS)
+    context = (len(languages) + 1) * tokens + PROMPT_OVERHEAD_TOKENS
+    chosen = model_router.choose(tokens, languages, context=context)
+    metrics.MODEL_ROUTING.labels(chosen, model_router.size_class(tokens)).inc()
+    return chosen
+
+async def translate(text, language, model):
+    """Translate one text, falling back to the mock translator; always returns a response dict"""
+    # Validate input
+    model = model or DEFAULT_MODEL
+    error = validate_translation(text, language) or validate_model(model)
+    if error is not None:
+        return error
+    
+    # Text already in the target language needs no model call
+    detected = detect_source_language(text)
+    unchanged = unchanged_translation(text, language, detected)
+    if unchanged is not None:
+        return unchanged
+    
+    model = resolve_model(model, text, [language])
+    
+    # Long documents are translated chunk by chunk
+    if estimate_tokens(text) > CHUNK_MAX_TOKENS:
+        return {**await translate_document(text, language, model), **detected}
+    
+    return {**await translate_segment(text, language, model), **detected}
+
+async def memory_match(text, language):
+    """Look `text` up in the translation memory.
+
+    Returns (response, reference): a response for a stored translation of the same text (up to
+    casing and punctuation), or the similar stored segment to pass to the prompt; both are None
+    when nothing similar is stored.
+    """
+    if translation_memory is None:
+        return None, None
+    result, hit = await translation_memory.match(text, language)
+    metrics.TRANSLATION_MEMORY_LOOKUPS.labels(result).inc()
+    if result == "match":
+        return {
+            "output": hit["target"],
+            "status": "success",
+            "model_used": "translation_memory",
+            "language": language,
+            "source": "translation_memory",
+            "similarity": hit["similarity"],
+            "matched_text": hit["source"]
+        }, None
+    return None, hit
+
+def translation_inputs(text, language, model, reference):
+    """Chain and inputs for translating `text`, with the translation memory's similar segment if any"""
+    if reference is None:
+        return chain_registry.get(model), {"language": language, "text": text}
+    return chain_registry.get_reference(model), {
+        "language": language,
+        "text": text,
+        "reference_source": reference["source"],
+        "reference_target": reference["target"]
+    }
+
+def hedge_model(model, text, language):
+    """Model for the hedge of a slow call to `model`"""
+    if HEDGE_MODEL != "auto":
+        return HEDGE_MODEL or model
+    tokens = estimate_tokens(text)
+    return model_router.choose(tokens, [language], context=estimate_request_tokens(text), exclude=[model])
+
+async def hedged_translation(text, language, model, reference):
+    """Translate `text` with `model`, hedged by a second call when it is slow.
+
+    Returns (translation, model that produced it, whether the hedge answered first).
+    """
+    async def call(name, on_start=None):
+        chain, inputs = translation_inputs(text, language, name, reference)
+        return name, await invoke_chain(chain, inputs, model=name, on_start=on_start)
+    
+    if hedger is None:
+        name, result = await call(model)
+        return result, name, False
+    
+    async def hedge():
+        name = hedge_model(model, text, language)
+        await admission.acquire(name, estimate_request_tokens(text))
+        return await call(name)
+    
+    # The hedge delay counts from when the call holds a GROQ_MAX_CONCURRENCY slot, like the latencies
+    # it is taken from, and calls are not hedged while every slot is taken
+    started = asyncio.Event()
+    key = (model, model_router.size_class(estimate_tokens(text)))
+    winner, (name, result) = await hedger.run(key, lambda: call(model, started.set), hedge, started=started,
+                                              can_hedge=lambda: not groq_semaphore.locked())
+    return result, name, winner == "hedge"
+
+async def remember_translation(text, language, result):
+    """Store a fresh Groq translation in the translation memory when TM_LEARN is on"""
+    if translation_memory is not None and TM_LEARN:
+        await translation_memory.add([(text, result, language)], origin="groq_api")
+
+async def translate_segment(text, language, model):
+    """Translate one validated text that fits in a single prompt"""
+    # Serve repeated translations from the cache
+    cache_key = make_cache_key(text, language, model, PROMPT_VERSION)
+    cached = await translation_cache.get(cache_key)
+    if cached is not None:
+        return {
+            "output": cached,
+            "status": "success",
+            "model_used": model,
+            "language": language,
+            "source": "cache"
+        }
+    
+    # Near-duplicates of approved translations come from the translation memory
+    match, reference = await memory_match(text, language)
+    if match is not None:
+        return match
     
     # Try Groq API first
-    if groq_api_key:
+    chain = get_chain(model)
+    if chain is not None:
         try:
-            # Initialize model
-            model = ChatGroq(model=request.model, groq_api_key=groq_api_key, timeout=30)
-            
-            # Create prompt template
-            prompt_template = ChatPromptTemplate.from_messages([
-                ('system', "You are a professional translator. Translate the following text into {language}. Provide only the translation without any additional text, explanations, or notes. Ensure the translation is accurate and natural sounding:"),
-                ('user', '{text}')
-            ])
+            async def call_groq():
+                await admission.acquire(model, estimate_request_tokens(text))
+                if reference is None and micro_batcher is not None and len(text) <= MICROBATCH_MAX_CHARS:
+                    result = await micro_batcher.submit((language, model), text)
+                    model_used, hedged = model, False
+                else:
+                    result, model_used, hedged = await hedged_translation(text, language, model, reference)
+                await translation_cache.set(cache_key, result, language, model)
+                await remember_translation(text, language, result)
+                return result, model_used, hedged
             
-            # Create chain
-            chain = prompt_template | model | StrOutputParser()
+            result, model_used, hedged = await translation_flight.do(cache_key, call_groq)
             
-            # Invoke the chain
-            result = chain.invoke({"language": request.language, "text": request.text})
-            
-            return {
+            response = {
                 "output": result, 
                 "status": "success", 
-                "model_used": request.model,
-                "language": request.language,
+                "model_used": model_used,
+                "language": language,
                 "source": "groq_api"
             }
+            if hedged:
+                response["hedged"] = True
+            if reference is not None:
+                response["reference_similarity"] = reference["similarity"]
+            return response
             
+        except AdmissionRejected:
+            raise
         except Exception as e:
             logger.error(f"Groq API translation error: {e}")
             # Fall through to mock translator
     
     # Fallback to mock translator
+    return fallback_translation(text, language)
+
+def start_document(text, language, model):
+    """Split a long text into chunks and start translating the distinct ones concurrently.
+
+    Returns (leading, chunks, trailing, tasks) with one task per distinct chunk content.
+    """
+    leading, chunks, trailing = segment(text, CHUNK_MAX_TOKENS)
+    semaphore = asyncio.Semaphore(CHUNK_MAX_CONCURRENCY)
+    
+    async def run(content):
+        async with semaphore:
+            return await translate_segment(content, language, model)
+    
+    tasks = {}
+    for content, _ in chunks:
+        if content not in tasks:
+            tasks[content] = asyncio.ensure_future(run(content))
+    return leading, chunks, trailing, tasks
+
+def document_response(text, language, model, leading, chunks, results, trailing):
+    """Response for a document from the results of its chunks, in order"""
+    failed = [result for result in results if result["status"] == "error"]
+    if failed:
+        return {**failed[0], "chunks": len(chunks)}
+    
+    output = reassemble(leading, chunks, [result["output"] for result in results], trailing)
+    if any(result["status"] == "partial_success" for result in results):
+        return {**fallback_translation(text, language), "output": output, "chunks": len(chunks)}
+    return {
+        "output": output,
+        "status": "success",
+        "model_used": model,
+        "language": language,
+        "source": "groq_api",
+        "chunks": len(chunks)
+    }
+
+async def translate_document(text, language, model):
+    """Split a long text into chunks, translate distinct chunks concurrently and reassemble them in order"""
+    leading, chunks, trailing, tasks = start_document(text, language, model)
+    try:
+        await asyncio.gather(*tasks.values())
+    finally:
+        for task in tasks.values():
+            task.cancel()
+    results = [tasks[content].result() for content, _ in chunks]
+    return document_response(text, language, model, leading, chunks, results, trailing)
+
+async def document_events(text, language, model):
+    """Translate a long text like translate_document, yielding each chunk's translation as a `token`
+    event once it and every chunk before it are done, then the `done` event"""
+    leading, chunks, trailing, tasks = start_document(text, language, model)
     try:
-        mock_result = mock_translator(request.text, request.language)
+        results = []
+        for index, (content, separator) in enumerate(chunks):
+            try:
+                result = await tasks[content]
+            except AdmissionRejected as e:
+                if not results:
+                    # Nothing was sent yet; the endpoint answers with a 429/503 status
+                    raise
+                yield {"type": "done", **admission_error(e), "language": language, "chunks": len(chunks)}
+                return
+            results.append(result)
+            if result["status"] != "error":
+                prefix = leading if index == 0 else ""
+                yield {"type": "token", "text": prefix + result["output"].strip() + separator}
+    finally:
+        for task in tasks.values():
+            task.cancel()
+    yield {"type": "done", **document_response(text, language, model, leading, chunks, results, trailing)}
+
+def fallback_translation(text, language):
+    """Translate with the mock translator when Groq is unavailable"""
+    try:
+        mock_result = mock_translator(text, language)
         return {
             "output": mock_result, 
             "status": "partial_success", 
             "model_used": "mock_translator",
-            "language": request.language,
+            "language": language,
             "source": "mock_translator",
             "message": "Groq API unavailable, using mock translator"
         }
@@ -199,6 +873,657 @@ async def translate_text(request: TranslationRequest):
             "source": "error"
         }
 
+# Main translation endpoint
+@app.post("/translate")
+async def translate_text(request: TranslationRequest):
+    started = time.perf_counter()
+    result = await translate(request.text, request.language, request.model)
+    metrics.observe_translation("/translate", result, request.text, time.perf_counter() - started)
+    return result
+
+def ndjson_event(event):
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+async def translation_events(text, language, model):
+    """Yield `token` events as the translation is generated, then one `done` event with the full
+    response and the detected source language"""
+    model = model or DEFAULT_MODEL
+    error = validate_translation(text, language) or validate_model(model)
+    if error is not None:
+        yield {"type": "done", **error}
+        return
+    
+    detected = detect_source_language(text)
+    unchanged = unchanged_translation(text, language, detected)
+    if unchanged is not None:
+        yield {"type": "token", "text": text}
+        yield {"type": "done", **unchanged}
+        return
+    
+    model = resolve_model(model, text, [language])
+    # Long documents are translated chunk by chunk, as by /translate, and streamed in chunk order
+    events = document_events if estimate_tokens(text) > CHUNK_MAX_TOKENS else generated_events
+    async for event in events(text, language, model):
+        yield {**event, **detected} if event["type"] == "done" else event
+
+async def generated_events(text, language, model):
+    """Events for a validated text: from the cache, the translation memory, a streamed model call or the fallback"""
+    cache_key = make_cache_key(text, language, model, PROMPT_VERSION)
+    cached = await translation_cache.get(cache_key)
+    if cached is not None:
+        yield {"type": "token", "text": cached}
+        yield {
+            "type": "done",
+            "output": cached,
+            "status": "success",
+            "model_used": model,
+            "language": language,
+            "source": "cache"
+        }
+        return
+    
+    match, reference = await memory_match(text, language)
+    if match is not None:
+        yield {"type": "token", "text": match["output"]}
+        yield {"type": "done", **match}
+        return
+    
+    if get_chain(model) is not None:
+        chain, inputs = translation_inputs(text, language, model, reference)
+        chunks = []
+        await admission.acquire(model, estimate_request_tokens(text))
+        try:
+            async for chunk in stream_chain(chain, inputs, model=model):
+                if chunk:
+                    chunks.append(chunk)
+                    yield {"type": "token", "text": chunk}
+            result = "".join(chunks)
+            await translation_cache.set(cache_key, result, language, model)
+            await remember_translation(text, language, result)
+            done = {
+                "type": "done",
+                "output": result,
+                "status": "success",
+                "model_used": model,
+                "language": language,
+                "source": "groq_api"
+            }
+            if reference is not None:
+                done["reference_similarity"] = reference["similarity"]
+            yield done
+            return
+        except Exception as e:
+            logger.error(f"Groq API streaming error: {e}")
+            if chunks:
+                # Part of the translation was already sent; a fallback would contradict it
+                yield {
+                    "type": "done",
+                    "output": "".join(chunks),
+                    "status": "error",
+                    "message": f"Translation stream interrupted: {str(e)}",
+                    "model_used": model,
+                    "source": "groq_api"
+                }
+                return
+    
+    fallback = fallback_translation(text, language)
+    yield {"type": "token", "text": fallback["output"]}
+    yield {"type": "done", **fallback}
+
+# Streaming translation endpoint (newline-delimited JSON events)
+@app.post("/translate/stream")
+async def translate_stream(request: TranslationRequest):
+    started = time.perf_counter()
+    events = translation_events(request.text, request.language, request.model)
+    # Wait for the first event before answering, so admission rejections become a 429/503 status
+    first = await events.__anext__()
+    
+    async def body():
+        event = first
+        while True:
+            if event["type"] == "done":
+                metrics.observe_translation("/translate/stream", event, request.text, time.perf_counter() - started)
+            yield ndjson_event(event)
+            try:
+                event = await events.__anext__()
+            except StopAsyncIteration:
+                break
+    
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+# Translate-as-you-type over a WebSocket. The client sends {"text", "version"} after every edit
+# and receives "patch" messages with the sentences whose translation changed; see live.py
+@app.websocket("/translate/live")
+async def translate_live(websocket: WebSocket, language: str, model: Optional[str] = None):
+    await websocket.accept()
+    model = model or DEFAULT_MODEL
+    if language not in LANGUAGE_MAP:
+        error = f"Language '{language}' not supported"
+    else:
+        error = (validate_model(model) or {}).get("message")
+    if error is not None:
+        await websocket.send_json({"type": "error", "message": error})
+        await websocket.close(code=1008)
+        return
+    
+    async def translate_sentence(text):
+        started = time.perf_counter()
+        result = await translate_bulk_item(text, language, model)
+        metrics.observe_translation("/translate/live", result, text, time.perf_counter() - started)
+        return result
+    
+    session = LiveSession(
+        translate_sentence,
+        websocket.send_json,
+        debounce=LIVE_DEBOUNCE_MS / 1000,
+        concurrency=LIVE_CONCURRENCY,
+        max_memory=LIVE_MAX_SENTENCES,
+        on_segment=lambda result, count: metrics.LIVE_SEGMENTS.labels(result).inc(count),
+    )
+    metrics.LIVE_SESSIONS.inc()
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            try:
+                message = json.loads(frame.get("text") or frame.get("bytes") or "")
+            except ValueError:
+                message = None  # not JSON: answered with an error like any other malformed message
+            text = message.get("text") if isinstance(message, dict) else None
+            if not isinstance(text, str):
+                await websocket.send_json({"type": "error", "message": "Expected {\"text\": ..., \"version\": ...}"})
+            elif len(text) > LIVE_MAX_CHARS:
+                await websocket.send_json({
+                    "type": "error",
+                    "version": message.get("version"),
+                    "message": f"Live translation is limited to {LIVE_MAX_CHARS} characters",
+                })
+            else:
+                session.update(text, message.get("version"))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        metrics.LIVE_SESSIONS.dec()
+        await session.close()
+        logger.info(f"Live translation session closed: {session.stats()}")
+
+# Batch translation request model
+class BatchTranslationRequest(BaseModel):
+    items: List[TranslationRequest]
+
+def admission_error(exc):
+    """Error response for one item of a request shed by admission control; the rest of the request goes on"""
+    metrics.ADMISSION_REJECTIONS.labels(str(exc.status_code)).inc()
+    return {
+        "output": f"Error: {exc.message}",
+        "status": "error",
+        "message": exc.message,
+        "model_used": "none",
+        "source": "admission",
+        "retry_after": exc.retry_after
+    }
+
+# Translate many short texts in one request; identical items are translated once
+@app.post("/translate/batch")
+async def translate_batch(request: BatchTranslationRequest):
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Batch has no items")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch is limited to {BATCH_MAX_ITEMS} items")
+    
+    unique = {}
+    for item in request.items:
+        unique.setdefault((item.text, item.language, item.model), None)
+    
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+    
+    async def run(key):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                unique[key] = await translate(*key)
+            except AdmissionRejected as e:
+                unique[key] = admission_error(e)
+            except Exception as e:
+                logger.error(f"Batch item translation error: {e}")
+                unique[key] = {
+                    "output": f"Error: {str(e)}",
+                    "status": "error",
+                    "message": str(e),
+                    "model_used": "none",
+                    "source": "error"
+                }
+            metrics.observe_translation("/translate/batch", unique[key], key[0], time.perf_counter() - started)
+    
+    await asyncio.gather(*(run(key) for key in unique))
+    
+    results = [
+        {"index": index, **unique[(item.text, item.language, item.model)]}
+        for index, item in enumerate(request.items)
+    ]
+    counts = {"success": 0, "partial_success": 0, "error": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    
+    if counts["error"] == len(results):
+        status = "error"
+    elif counts["success"] == len(results):
+        status = "success"
+    else:
+        status = "partial_success"
+    
+    return {
+        "status": status,
+        "results": results,
+        "summary": {**counts, "total": len(results), "unique": len(unique)}
+    }
+
+async def translate_bulk_item(text, language, model):
+    """Translate one job item or file field; items shed by admission control wait and retry instead of failing"""
+    while True:
+        try:
+            return await translate(text, language, model)
+        except AdmissionRejected as e:
+            await asyncio.sleep(e.retry_after)
+        except Exception as e:
+            logger.error(f"Job item translation error: {e}")
+            return {
+                "output": f"Error: {str(e)}",
+                "status": "error",
+                "message": str(e),
+                "model_used": "none",
+                "source": "error"
+            }
+
+job_store = JobStore(JOBS_DB_PATH)
+job_runner = JobRunner(
+    job_store,
+    translate_bulk_item,
+    workers=JOB_WORKERS,
+    item_concurrency=JOB_ITEM_CONCURRENCY,
+    retention=JOB_RETENTION_HOURS * 3600,
+)
+
+# Queue a bulk translation job; same body as /translate/batch, processed in the background
+@app.post("/jobs", status_code=202)
+async def create_job(request: BatchTranslationRequest):
+    if not request.items:
+        raise HTTPException(status_code=400, detail="A job needs at least one item")
+    if len(request.items) > JOB_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Jobs are limited to {JOB_MAX_ITEMS} items")
+    
+    job_id = await job_runner.submit([(item.text, item.language, item.model) for item in request.items])
+    return {"id": job_id, "status": "queued", "total": len(request.items), "url": f"/jobs/{job_id}"}
+
+# Job worker pool statistics
+@app.get("/jobs")
+async def job_stats():
+    return await job_runner.stats()
+
+# Job progress, with finished results paged by `offset` / `limit`
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, offset: int = 0, limit: int = 100):
+    if offset < 0 or not 0 < limit <= 1000:
+        raise HTTPException(status_code=400, detail="offset must be >= 0 and limit between 1 and 1000")
+    job = await job_runner.get(job_id, offset, limit)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+# Cancel a queued or running job; results finished so far are kept
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    if await job_runner.cancel(job_id):
+        return {"status": "success", "id": job_id, "job_status": "cancelled"}
+    job = await job_runner.get(job_id, 0, 1)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+
+async def translated_file_body(reader, language, model):
+    """Yield the translated file, in input order, while later records are still being translated"""
+    semaphore = asyncio.Semaphore(FILE_MAX_CONCURRENCY)
+    
+    async def translate_field(text):
+        started = time.perf_counter()
+        async with semaphore:
+            result = await translate_bulk_item(text, language, model)
+        metrics.observe_translation("/translate/file", result, text, time.perf_counter() - started)
+        # Keep the source text rather than writing mock translations or errors into the file
+        return result["output"] if result["status"] == "success" else text
+    
+    async def translate_record(texts):
+        return await asyncio.gather(*(translate_field(text) for text in texts))
+    
+    records = iter(reader)
+    window = deque()
+    exhausted = False
+    output = [reader.header]
+    try:
+        while True:
+            if not exhausted and len(window) < FILE_WINDOW_RECORDS:
+                batch = await asyncio.to_thread(take, records, FILE_READ_BATCH)
+                exhausted = len(batch) < FILE_READ_BATCH
+                for record, texts in batch:
+                    window.append((record, asyncio.ensure_future(translate_record(texts)) if texts else None))
+            
+            while window and (window[0][1] is None or window[0][1].done()):
+                record, task = window.popleft()
+                output.append(reader.render(record, task.result() if task else []))
+            if any(output):
+                yield "".join(output)
+            output = []
+            
+            if exhausted and not window:
+                return
+            if window and (exhausted or len(window) >= FILE_WINDOW_RECORDS):
+                await asyncio.wait({window[0][1]})
+    finally:
+        for _, task in window:
+            if task is not None:
+                task.cancel()
+
+# Translate an uploaded TXT, CSV (chosen `columns`) or JSONL (chosen `keys`) file, streaming
+# the result back in the same format
+@app.post("/translate/file")
+async def translate_file(
+    language: str,
+    file: UploadFile = File(...),
+    model: Optional[str] = None,
+    format: Optional[str] = None,
+    columns: Optional[str] = None,
+    keys: Optional[str] = None,
+    header: bool = True
+):
+    if language not in LANGUAGE_MAP:
+        raise HTTPException(status_code=400, detail=f"Language '{language}' not supported")
+    model = model or DEFAULT_MODEL
+    error = validate_model(model)
+    if error is not None:
+        raise HTTPException(status_code=400, detail=error["message"])
+    
+    def split(names):
+        return [name.strip() for name in names.split(",") if name.strip()] if names else []
+    
+    try:
+        file_format = detect_format(file.filename, format)
+        # Uploads are spooled to disk by the form parser; the reader pulls from there incrementally
+        reader = await asyncio.to_thread(open_file, file_format, file.file, split(columns), split(keys), header)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    stem = re.sub(r"[^\w.-]", "_", (file.filename or "translation").rsplit(".", 1)[0])
+    filename = f"{stem}.{LANGUAGE_MAP[language]['code']}.{file_format}"
+    return StreamingResponse(
+        translated_file_body(reader, language, model),
+        media_type=FILE_FORMATS[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Cache statistics
+@app.get("/cache/stats")
+async def cache_stats():
+    stats = {**await translation_cache.stats(), "coalescing": translation_flight.stats()}
+    if micro_batcher is not None:
+        stats["micro_batching"] = micro_batcher.stats()
+    if translation_memory is not None:
+        stats["translation_memory"] = translation_memory.stats()
+    return stats
+
+# Purge cached translations, optionally for one language and/or model
+@app.delete("/cache")
+async def purge_cache(language: Optional[str] = None, model: Optional[str] = None):
+    purged = await translation_cache.purge(language=language, model=model)
+    return {"status": "success", "purged": purged}
+
+def require_translation_memory():
+    if translation_memory is None:
+        raise HTTPException(status_code=404, detail="Translation memory is disabled (TM_DB_PATH is empty)")
+    return translation_memory
+
+# Seed the translation memory from a bilingual file: JSONL with source/target/language keys,
+# or TSV of source<TAB>target lines for one `language`
+@app.post("/memory/import")
+async def import_memory(file: UploadFile = File(...), format: Optional[str] = None, language: Optional[str] = None):
+    memory = require_translation_memory()
+    file_format = (format or ("tsv" if (file.filename or "").lower().endswith(".tsv") else "jsonl")).lower()
+    if file_format not in ("jsonl", "tsv"):
+        raise HTTPException(status_code=400, detail="format must be jsonl or tsv")
+    if language is not None and language not in LANGUAGE_MAP:
+        raise HTTPException(status_code=400, detail=f"Language '{language}' not supported")
+    if file_format == "tsv" and language is None:
+        raise HTTPException(status_code=400, detail="language is required for TSV files")
+    
+    try:
+        content = (await file.read()).decode("utf-8-sig")
+        entries = list(parse_bilingual(content.splitlines(), file_format, language))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    unsupported = sorted({entry[2] for entry in entries if entry[2] not in LANGUAGE_MAP}, key=str)
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"Unsupported languages in file: {', '.join(map(str, unsupported))}")
+    
+    imported = await memory.add(entries)
+    return {"status": "success", "imported": imported, "segments": memory.stats()["segments"]}
+
+# Export the whole translation memory as JSONL, in the same format /memory/import accepts
+@app.get("/memory/export")
+async def export_memory():
+    memory = require_translation_memory()
+    return StreamingResponse(
+        memory.export_rows(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="translation_memory.jsonl"'}
+    )
+
+# Multi-language translation request model; `languages` is a list of names or "all"
+class MultiTranslationRequest(BaseModel):
+    text: str
+    languages: Union[List[str], str] = "all"
+    model: Optional[str] = None
+
+async def translate_multi_prompt(text, languages, model):
+    """Translate a short text into several languages with one structured prompt.
+
+    Returns {language: response} for the languages the model answered; the rest are left to the caller.
+    """
+    get_chain(model)
+    chain = chain_registry.get_multi(model)
+    if chain is None:
+        return {}
+    await admission.acquire(model, (len(languages) + 1) * estimate_tokens(text) + PROMPT_OVERHEAD_TOKENS)
+    try:
+        inputs = {"languages": ", ".join(languages), "text": text}
+        output = await invoke_chain(chain, inputs, model=model, operation="multi_language")
+        translations = parse_language_map(output, languages)
+    except Exception as e:
+        logger.warning(f"Multi-language prompt fell back to per-language calls: {e}")
+        return {}
+    
+    results = {}
+    for language, translation in translations.items():
+        await translation_cache.set(make_cache_key(text, language, model, PROMPT_VERSION), translation, language, model)
+        results[language] = {
+            "output": translation,
+            "status": "success",
+            "model_used": model,
+            "language": language,
+            "source": "groq_api"
+        }
+    return results
+
+# Translate one text into many languages at once
+@app.post("/translate/multi")
+async def translate_multi(request: MultiTranslationRequest):
+    started = time.perf_counter()
+    languages = list(LANGUAGE_MAP) if request.languages == "all" else request.languages
+    if isinstance(languages, str) or not languages:
+        raise HTTPException(status_code=400, detail='languages must be a list of language names or "all"')
+    languages = list(dict.fromkeys(languages))
+    model = request.model or DEFAULT_MODEL
+    error = validate_model(model)
+    if error is not None:
+        raise HTTPException(status_code=400, detail=error["message"])
+    # One model serves every language, so they share the cache and the multi-language prompt
+    model = resolve_model(model, request.text, [language for language in languages if language in LANGUAGE_MAP])
+    detected = detect_source_language(request.text) if request.text.strip() else None
+    
+    results = {}
+    pending = []
+    for language in languages:
+        error = validate_translation(request.text, language)
+        if error is not None:
+            results[language] = error
+            continue
+        unchanged = unchanged_translation(request.text, language, detected)
+        if unchanged is not None:
+            results[language] = unchanged
+            continue
+        cached = await translation_cache.get(make_cache_key(request.text, language, model, PROMPT_VERSION))
+        if cached is not None:
+            results[language] = {
+                "output": cached,
+                "status": "success",
+                "model_used": model,
+                "language": language,
+                "source": "cache"
+            }
+            continue
+        match, _ = await memory_match(request.text, language)
+        if match is not None:
+            results[language] = match
+        else:
+            pending.append(language)
+    
+    # Short texts: one prompt for every missing language; anything it misses is translated separately
+    # Languages shed by admission control get an error entry; the others are still returned
+    if len(pending) > 1 and len(request.text) <= MULTI_PROMPT_MAX_CHARS:
+        try:
+            results.update(await translate_multi_prompt(request.text, pending, model))
+        except AdmissionRejected as e:
+            results.update({language: {**admission_error(e), "language": language} for language in pending})
+        pending = [language for language in pending if language not in results]
+    
+    semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+    
+    async def run(language):
+        async with semaphore:
+            try:
+                results[language] = await translate(request.text, language, model)
+            except AdmissionRejected as e:
+                results[language] = {**admission_error(e), "language": language}
+    
+    await asyncio.gather(*(run(language) for language in pending))
+    
+    if detected is not None:
+        for language, result in results.items():
+            if result["source"] != "validation":
+                results[language] = {**result, **detected}
+    
+    duration = time.perf_counter() - started
+    for language in languages:
+        metrics.observe_translation("/translate/multi", results[language], request.text, duration)
+    
+    counts = {"success": 0, "partial_success": 0, "error": 0}
+    for result in results.values():
+        counts[result["status"]] += 1
+    if counts["error"] == len(results):
+        status = "error"
+    elif counts["success"] == len(results):
+        status = "success"
+    else:
+        status = "partial_success"
+    
+    return {
+        "status": status,
+        "model_used": model,
+        **(detected or {}),
+        "translations": {language: results[language] for language in languages},
+        "summary": {**counts, "total": len(results)}
+    }
+
+# Text-to-speech request model
+class SpeechRequest(BaseModel):
+    text: str
+    language: str
+
+# Synthesize speech once per (text, language) and return the content-addressed MP3 URL
+@app.post("/tts")
+async def create_speech(request: SpeechRequest):
+    text = request.text.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Text is required")
+    if len(text) > TTS_MAX_CHARS:
+        raise HTTPException(status_code=413, detail=f"Text-to-speech is limited to {TTS_MAX_CHARS} characters")
+    if request.language not in LANGUAGE_MAP:
+        raise HTTPException(status_code=400, detail=f"Language '{request.language}' not supported")
+    
+    lang_code = LANGUAGE_MAP[request.language]["code"]
+    key = audio_id(text, lang_code)
+    cached = audio_cache.get(key) is not None
+    if not cached:
+        async def render():
+            data = await asyncio.to_thread(synthesize, text, lang_code)
+            await asyncio.to_thread(audio_cache.put, key, data)
+        
+        try:
+            await speech_flight.do(key, render)
+        except Exception as e:
+            logger.error(f"Text-to-speech error: {e}")
+            raise HTTPException(status_code=502, detail=f"Text-to-speech failed: {str(e)}")
+    
+    return {
+        "status": "success",
+        "id": key,
+        "url": f"/tts/{key}.mp3",
+        "language": request.language,
+        "cached": cached
+    }
+
+# Serve a synthesized MP3; immutable, so browsers cache it, with ETag and Range support
+@app.get("/tts/{key}.mp3")
+async def get_speech(key: str, request: Request):
+    path = audio_cache.get(key) if re.fullmatch(r"[0-9a-f]{64}", key) else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    
+    etag = f'"{key}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable"
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    data = await asyncio.to_thread(read_audio, path)
+    try:
+        byte_range = parse_range(request.headers.get("range"), len(data))
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(data)}"})
+    if byte_range is None:
+        return Response(content=data, media_type="audio/mpeg", headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+    return Response(content=data[start:end + 1], status_code=206, media_type="audio/mpeg", headers=headers)
+
+# Prometheus metrics
+@app.get("/metrics")
+async def get_metrics():
+    body, content_type = metrics.render_metrics()
+    return Response(content=body, media_type=content_type)
+
+# Time spent importing this module and its dependencies, reported by /ready and /metrics
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+metrics.STARTUP_SECONDS.labels("import").set(IMPORT_SECONDS)
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 8000))
@@ -0,0 +1,54 @@
+import asyncio
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key starts the work in its own task; identical calls that arrive
+    while it is running await the same task. A caller being cancelled does not cancel the
+    work for the others; the work is only cancelled once every caller has gone away.
+    Exceptions are raised to every caller.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """Return the result of `await fn()`, sharing it with concurrent calls for `key`"""
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.create_task(fn())
+            call = self._calls[key] = [task, 0]
+            task.add_done_callback(lambda t: self._finish(key, t))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        task = call[0]
+        call[1] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and call[1] == 1:
+                task.cancel()
+            raise
+        finally:
+            call[1] -= 1
+
+    def _finish(self, key, task):
+        if self._calls.get(key, [None])[0] is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller was cancelled
+            task.exception()
+
+    def stats(self):
+        total = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / total, 4) if total else 0.0,
+        }
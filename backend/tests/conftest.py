@@ -0,0 +1,17 @@
+import os
+import sys
+import tempfile
+
+# Tests import the backend modules the way server.py does, from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LLM_BACKEND", "fake")
+
+# server.py opens its SQLite stores when the app starts; keep them out of the source tree
+STATE_DIR = tempfile.TemporaryDirectory(prefix="robotranslate-tests-")
+for name, filename in (
+    ("JOBS_DB_PATH", "jobs.db"),
+    ("TM_DB_PATH", "translation_memory.db"),
+    ("CACHE_DB_PATH", "translation_cache.db"),
+    ("ADMISSION_DB_PATH", "admission.db"),
+):
+    os.environ[name] = os.path.join(STATE_DIR.name, filename)
@@ -0,0 +1,19 @@
+import asyncio
+import time
+
+from admission import ModelAdmission, SharedBucketStore
+
+
+def test_shared_buckets_saved_before_a_reboot_still_admit(tmp_path):
+    db_path = str(tmp_path / "admission.db")
+    store = SharedBucketStore(db_path)
+    store.open()
+    # A balance written by a host whose clock was a day ahead of this one
+    store._db.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+    store._db.execute("INSERT INTO buckets VALUES ('model:requests', 5, ?)", (time.time() + 86400,))
+
+    admission = ModelAdmission(rpm=60, max_wait=0, model="model", store=store)
+    asyncio.run(admission.acquire(1))
+    asyncio.run(admission.acquire(1))
+    store.close()
+    assert admission.admitted == 2
@@ -0,0 +1,26 @@
+import asyncio
+
+from cache import TranslationCache
+
+
+def test_purge_reaches_the_memory_tier_of_other_processes(tmp_path):
+    async def run():
+        db_path = str(tmp_path / "cache.db")
+        worker_a = TranslationCache(db_path=db_path, sync_interval=0)
+        worker_b = TranslationCache(db_path=db_path, sync_interval=0)
+        for cache in (worker_a, worker_b):
+            cache.open()
+        await worker_b.set("fr", "Bonjour", "French", "model")
+        await worker_b.set("de", "Hallo", "German", "model")
+        assert await worker_b.get("fr") == "Bonjour"
+
+        await worker_a.purge(language="French")
+        french, german = await worker_b.get("fr"), await worker_b.get("de")
+
+        await worker_b.set("fr", "Salut", "French", "model")
+        fresh = await worker_b.get("fr")
+        for cache in (worker_a, worker_b):
+            cache.close()
+        return french, german, fresh
+
+    assert asyncio.run(run()) == (None, "Hallo", "Salut")
@@ -0,0 +1,36 @@
+from chunking import estimate_tokens, reassemble, segment, sentences
+
+CHINESE = "我今天早上去公园散步。" * 900
+
+
+def test_cjk_characters_count_as_tokens():
+    assert estimate_tokens(CHINESE) >= len(CHINESE) * 0.9
+    assert estimate_tokens("The quick brown fox jumps over the lazy dog.") == 11
+
+
+def test_cjk_document_is_split_after_sentence_terminators():
+    leading, chunks, trailing = segment(CHINESE, 800)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(content) <= 800 for content, _ in chunks)
+    assert all(content.endswith("。") for content, _ in chunks)
+    assert reassemble(leading, chunks, [content for content, _ in chunks], trailing) == CHINESE
+
+
+def test_text_without_separators_is_split_by_characters():
+    text = "我" * 2000
+    leading, chunks, trailing = segment(text, 800)
+    assert [len(content) for content, _ in chunks] == [800, 800, 400]
+    assert reassemble(leading, chunks, [content for content, _ in chunks], trailing) == text
+
+
+def test_sentences_split_cjk_and_latin():
+    _, pieces, _ = sentences("你好。今天天气很好！ Hello there. OK")
+    assert pieces == [("你好。", ""), ("今天天气很好！", " "), ("Hello there.", " "), ("OK", "")]
+
+
+def test_short_paragraphs_are_packed_into_few_chunks():
+    text = "\n\n".join(f"Paragraph {index} is short but there are many of them." for index in range(300)) + "\n"
+    leading, chunks, trailing = segment(text, 800)
+    assert len(chunks) < 10
+    assert all(estimate_tokens(content) <= 800 for content, _ in chunks)
+    assert reassemble(leading, chunks, [content for content, _ in chunks], trailing) == text
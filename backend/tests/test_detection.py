@@ -0,0 +1,58 @@
+import pytest
+
+from detection import SCRIPT_ONLY_CONFIDENCE, detect_language
+
+SKIP_CONFIDENCE = 0.9  # server.py's default DETECTION_SKIP_CONFIDENCE
+
+
+@pytest.mark.parametrize("text, language", [
+    ("Hello, how are you?", "English"),
+    ("The weather is nice today and we are going to the park.", "English"),
+    ("Je suis très content de vous voir, merci pour tout.", "French"),
+    ("Der Hund ist sehr groß und wir gehen heute in den Park.", "German"),
+    ("Merhaba, bugün nasılsın? Çok teşekkür ederim.", "Turkish"),
+    ("こんにちは、元気ですか？", "Japanese"),
+    ("안녕하세요", "Korean"),
+    ("Καλημέρα, τι κάνεις;", "Greek"),
+])
+def test_confident_detection(text, language):
+    detection = detect_language(text)
+    assert detection["language"] == language
+    assert detection["confidence"] >= SKIP_CONFIDENCE
+
+
+@pytest.mark.parametrize("text", [
+    "To jest mój dom i to jest mój pies, a to jest mój kot.",  # Polish, three English stopwords
+    "To jest mój dom i to jest mój pies…",
+])
+def test_unsupported_latin_language_is_not_confident(text):
+    assert detect_language(text)["confidence"] < SKIP_CONFIDENCE
+
+
+def test_foreign_latin_letters_mean_unknown():
+    assert detect_language("Zażółć gęślą jaźń")["language"] is None
+
+
+@pytest.mark.parametrize("text, language", [
+    ("Това е моята къща и това е моето куче.", "Russian"),  # Bulgarian
+    ("Це наша хата, а це собака.", "Russian"),  # Ukrainian without Ukrainian-only letters
+    ("Привет, как дела?", "Russian"),
+    ("東京大学", "Chinese"),  # Japanese written in kanji only
+    ("مرحبا كيف حالك", "Arabic"),
+    ("नमस्ते आप कैसे हैं", "Hindi"),
+])
+def test_shared_script_is_never_confident(text, language):
+    detection = detect_language(text)
+    assert detection["language"] == language
+    assert detection["confidence"] <= SCRIPT_ONLY_CONFIDENCE < SKIP_CONFIDENCE
+
+
+@pytest.mark.parametrize("text, language", [
+    ("To jest mój dom i to jest mój pies…", "English"),
+    ("Това е моята къща и това е моето куче.", "Russian"),
+    ("東京大学", "Chinese"),
+])
+def test_server_translates_misdetected_text(text, language):
+    server = pytest.importorskip("server")
+    detected = server.detect_source_language(text)
+    assert server.unchanged_translation(text, language, detected) is None
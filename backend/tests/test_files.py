@@ -0,0 +1,13 @@
+import io
+
+import pytest
+
+from files import open_file
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_csv_keeps_the_input_line_endings(newline):
+    data = newline.join(["name,text", "a,Hello", "b,Bye", ""]).encode()
+    reader = open_file("csv", io.BytesIO(data), columns=["text"])
+    output = reader.header + "".join(reader.render(row, [text.upper() for text in texts]) for row, texts in reader)
+    assert output == newline.join(["name,text", "a,HELLO", "b,BYE", ""])
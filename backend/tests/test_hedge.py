@@ -0,0 +1,47 @@
+import asyncio
+
+from hedge import Hedger
+
+
+def hedger():
+    hedger = Hedger(min_samples=1, min_delay=0.01, budget=1, burst=10)
+    hedger.observe("key", 0.01)
+    return hedger
+
+
+def test_delay_counts_from_when_the_primary_starts():
+    async def run():
+        h = hedger()
+        started = asyncio.Event()
+        hedges = []
+
+        async def primary():
+            await asyncio.sleep(0.1)  # queueing for a concurrency slot
+            started.set()
+            await asyncio.sleep(0.005)
+            return "primary"
+
+        async def hedge():
+            hedges.append(1)
+            return "hedge"
+
+        return await h.run("key", primary, hedge, started=started), hedges
+
+    assert asyncio.run(run()) == (("primary", "primary"), [])
+
+
+def test_no_hedge_without_spare_capacity():
+    async def run():
+        h = hedger()
+
+        async def primary():
+            await asyncio.sleep(0.05)
+            return "primary"
+
+        async def hedge():
+            return "hedge"
+
+        result = await h.run("key", primary, hedge, can_hedge=lambda: False)
+        return result, h.counts["busy"], h.counts["hedged"]
+
+    assert asyncio.run(run()) == (("primary", "primary"), 1, 0)
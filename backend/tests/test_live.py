@@ -0,0 +1,33 @@
+import time
+
+import pytest
+
+server = pytest.importorskip("server")
+from fastapi.testclient import TestClient
+
+
+def receive_until_done(websocket):
+    while True:
+        message = websocket.receive_json()
+        if message["type"] == "patch" and message["pending"] == 0:
+            return message
+
+
+def test_malformed_frames_keep_the_session_open():
+    with TestClient(server.app) as client:
+        for _ in range(100):
+            if client.get("/ready").status_code == 200:
+                break
+            time.sleep(0.1)
+        with client.websocket_connect("/translate/live?language=French") as websocket:
+            websocket.send_text("not json")
+            assert websocket.receive_json()["type"] == "error"
+            websocket.send_bytes(b"\xff")
+            assert websocket.receive_json()["type"] == "error"
+            websocket.send_json(["text"])
+            assert websocket.receive_json()["type"] == "error"
+
+            websocket.send_json({"text": "Good morning. See you.", "version": 1})
+            patch = receive_until_done(websocket)
+            assert patch["version"] == 1
+            assert patch["length"] == 2
@@ -0,0 +1,40 @@
+import asyncio
+
+from memory import TranslationMemory
+
+SOURCE = ("Your order of 150 dollars will be shipped within three business days, and a confirmation "
+          "email with the tracking number follows.")
+TARGET = ("Votre commande de 150 dollars sera expédiée sous trois jours ouvrables, et un e-mail de "
+          "confirmation avec le numéro de suivi suivra.")
+
+
+def match_all(tmp_path, queries):
+    async def run():
+        memory = TranslationMemory(str(tmp_path / "tm.db"))
+        await memory.open()
+        try:
+            await memory.add([(SOURCE, TARGET, "French")])
+            return [await memory.match(query, language) for query, language in queries]
+        finally:
+            await memory.aclose()
+    return asyncio.run(run())
+
+
+def test_normalized_exact_match_is_served(tmp_path):
+    (result, hit), = match_all(tmp_path, [(SOURCE.upper().replace(",", ""), "French")])
+    assert result == "match"
+    assert hit["target"] == TARGET
+
+
+def test_near_duplicates_are_only_references(tmp_path):
+    results = match_all(tmp_path, [
+        (SOURCE.replace("150", "950"), "French"),
+        (SOURCE.replace("will be shipped", "will not be shipped"), "French"),
+    ])
+    assert [result for result, _ in results] == ["reference", "reference"]
+    assert all(hit["similarity"] < 1 for _, hit in results)
+
+
+def test_other_languages_miss(tmp_path):
+    (result, hit), = match_all(tmp_path, [(SOURCE, "German")])
+    assert (result, hit) == ("miss", None)
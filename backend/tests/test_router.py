@@ -0,0 +1,39 @@
+import time
+
+from resilience import CircuitBreaker
+from router import ModelRouter
+
+
+def tripped_router(reset_timeout):
+    breakers = {model: CircuitBreaker(model, failure_threshold=5, reset_timeout=reset_timeout)
+                for model in ("fast", "slow")}
+    router = ModelRouter(["fast", "slow"], explore=0.0, error_half_life=reset_timeout,
+                         is_available=lambda model: breakers[model].allows_call())
+    for _ in range(20):
+        router.observe("fast", 10, 0.1, ok=True)
+        router.observe("slow", 10, 0.5, ok=True)
+    for _ in range(5):
+        router.observe("fast", 10, 0.1, ok=False)
+        breakers["fast"].record_failure()
+    return router, breakers
+
+
+def test_open_breaker_is_avoided():
+    router, breakers = tripped_router(reset_timeout=60)
+    assert breakers["fast"].state == CircuitBreaker.OPEN
+    assert {router.choose(10) for _ in range(50)} == {"slow"}
+
+
+def test_tripped_model_gets_a_trial_call_after_reset_timeout():
+    router, breakers = tripped_router(reset_timeout=0.05)
+    time.sleep(0.06)
+    assert breakers["fast"].allows_call()
+    assert breakers["fast"].state == CircuitBreaker.OPEN  # allows_call() does not change state
+    assert router.choose(10) == "fast"
+
+    breakers["fast"].before_call()
+    assert not breakers["fast"].allows_call()  # one trial at a time
+    assert router.choose(10) == "slow"
+    breakers["fast"].record_success()
+    router.observe("fast", 10, 0.1, ok=True)
+    assert router.choose(10) == "fast"
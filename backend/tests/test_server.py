@@ -0,0 +1,69 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+server = pytest.importorskip("server")
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+
+@pytest.fixture
+def client():
+    with TestClient(server.app) as client:
+        for _ in range(100):
+            if client.get("/ready").status_code == 200:
+                break
+            time.sleep(0.1)
+        yield client
+
+
+def test_long_text_is_not_skipped_on_its_opening(client):
+    intro = "This is the English introduction of the report, and it is the part we have read. " * 30
+    body = "Le reste du rapport est écrit en français et il doit être traduit avec le texte. " * 30
+    response = client.post("/translate", json={"text": intro + body, "language": "English"}).json()
+    assert response["source"] != "detection"
+
+
+def test_short_text_already_in_the_language_is_returned_unchanged(client):
+    text = "The weather is nice today and we are going to the park."
+    response = client.post("/translate", json={"text": text, "language": "English"}).json()
+    assert response["source"] == "detection"
+    assert response["output"] == text
+
+
+def test_stream_ends_with_done_when_a_later_chunk_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(server, "admission", server.AdmissionController(default_rpm=3, max_wait=0))
+    paragraphs = [f"Paragraph {index} of the stream test has a sentence of its own. " * 45 for index in range(6)]
+    response = client.post("/translate/stream", json={"text": "\n\n".join(paragraphs), "language": "French"})
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["type"] == "token"
+    assert events[-1]["type"] == "done"
+    assert events[-1]["source"] == "admission"
+
+
+def test_streamed_responses_are_timed_to_their_last_body_message():
+    labels = {"method": "POST", "path": "/translate/stream"}
+    in_flight = []
+
+    async def streaming_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"token", "more_body": True})
+        await asyncio.sleep(0.2)
+        in_flight.append(REGISTRY.get_sample_value("http_requests_in_flight", {"path": "/translate/stream"}))
+        await send({"type": "http.response.body", "body": b"done"})
+
+    async def send(message):
+        pass
+
+    before = REGISTRY.get_sample_value("http_request_duration_seconds_sum", labels) or 0.0
+    scope = {"type": "http", "method": "POST", "path": "/translate/stream", "root_path": "", "headers": []}
+    asyncio.run(server.HTTPMetricsMiddleware(streaming_app)(scope, None, send))
+    assert REGISTRY.get_sample_value("http_request_duration_seconds_sum", labels) - before >= 0.2
+    assert in_flight[0] >= 1
+
+
+def test_empty_batch_is_rejected(client):
+    assert client.post("/translate/batch", json={"items": []}).status_code == 400
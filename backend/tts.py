@@ -0,0 +1,121 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def audio_id(text, lang_code):
+    """Content address of the speech for `text` in `lang_code`"""
+    return hashlib.sha256(f"{lang_code}\n{text}".encode("utf-8")).hexdigest()
+
+
+def synthesize(text, lang_code):
+    """Render `text` to MP3 bytes with gTTS (blocking network call)"""
+    from gtts import gTTS  # imported on first use, keeping it out of server start-up
+    audio = BytesIO()
+    gTTS(text, lang=lang_code).write_to_fp(audio)
+    return audio.getvalue()
+
+
+def read_audio(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def parse_range(header, size):
+    """Parse a single `bytes=start-end` Range header into (start, end) inclusive.
+
+    Returns None when the header should be ignored, and raises ValueError when the
+    range cannot be satisfied.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # Suffix range: the last `end` bytes
+        length = int(end)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+class AudioCache:
+    """Content-addressed MP3 files on disk, capped at `max_bytes` with least-recently-used eviction.
+
+    Files are named after their audio_id; a read refreshes the file's mtime, which is the
+    LRU order used for eviction.
+    """
+
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._files())
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def _files(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".mp3"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def get(self, key):
+        """Return the cached MP3 path for `key`, or None"""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, data):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        with self._lock:
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp, path)
+            self._size += len(data) - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+        return path
+
+    def _evict(self):
+        files = sorted(self._files(), key=lambda entry: entry[2])
+        self._size = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self._size -= size
+            except FileNotFoundError:
+                pass
+        logger.info(f"Audio cache evicted down to {self._size} bytes")
+
+    def stats(self):
+        return {"directory": self.directory, "bytes": self._size, "max_bytes": self.max_bytes}
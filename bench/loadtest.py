@@ -0,0 +1,303 @@
+"""Load generator for the translation backend.
+
+Drives an endpoint at one or more concurrency levels, then reports throughput and latency
+percentiles and saves them as JSON so runs can be compared across commits.
+
+    # Against a backend started with LLM_BACKEND=fake (no Groq quota used)
+    python bench/loadtest.py --spawn --scenario translate --concurrency 1,8,32 --output before.json
+    python bench/loadtest.py --spawn --scenario translate --concurrency 1,8,32 --compare before.json
+
+    # Cold start only: time from launching the backend until /healthz and /ready answer
+    python bench/loadtest.py --startup 5 --output startup.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+SCENARIOS = ["translate", "stream", "batch", "check_groq", "languages", "mixed"]
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[max(0, math.ceil(pct / 100 * len(values)) - 1)], 2)
+
+
+def make_texts(count):
+    words = ["hello", "world", "robot", "translate", "message", "friendly", "language", "today", "please", "thanks"]
+    rng = random.Random(42)
+    return [f"{' '.join(rng.choice(words) for _ in range(rng.randint(3, 12)))} #{i}" for i in range(count)]
+
+
+class Run:
+    def __init__(self):
+        self.latencies = []
+        self.first_token = []
+        self.errors = Counter()
+        self.sources = Counter()
+
+    def summary(self, elapsed):
+        ms = [latency * 1000 for latency in self.latencies]
+        result = {
+            "requests": len(ms),
+            "errors": sum(self.errors.values()),
+            "error_kinds": dict(self.errors),
+            "throughput_rps": round(len(ms) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": percentile(ms, 50),
+            "p95_ms": percentile(ms, 95),
+            "p99_ms": percentile(ms, 99),
+            "max_ms": round(max(ms), 2) if ms else None,
+            "sources": dict(self.sources),
+        }
+        if self.first_token:
+            ttft = [latency * 1000 for latency in self.first_token]
+            result["ttft_p50_ms"] = percentile(ttft, 50)
+            result["ttft_p95_ms"] = percentile(ttft, 95)
+        return result
+
+
+async def one_request(client, scenario, texts, args, run):
+    if scenario == "mixed":
+        scenario = random.choices(["translate", "stream", "batch", "check_groq"], weights=[70, 15, 5, 10])[0]
+    text = random.choice(texts)
+    started = time.perf_counter()
+    try:
+        if scenario == "translate":
+            response = await client.post("/translate", json={"text": text, "language": args.language, "model": args.model})
+            response.raise_for_status()
+            run.sources[response.json().get("source", "unknown")] += 1
+        elif scenario == "stream":
+            async with client.stream(
+                "POST", "/translate/stream", json={"text": text, "language": args.language, "model": args.model}
+            ) as response:
+                response.raise_for_status()
+                first_token = None
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if event.get("type") == "token" and first_token is None:
+                        first_token = time.perf_counter() - started
+                        run.first_token.append(first_token)
+                    elif event.get("type") == "done":
+                        run.sources[event.get("source", "unknown")] += 1
+        elif scenario == "batch":
+            items = [{"text": random.choice(texts), "language": args.language, "model": args.model}
+                     for _ in range(args.batch_size)]
+            response = await client.post("/translate/batch", json={"items": items})
+            response.raise_for_status()
+            for result in response.json().get("results", []):
+                run.sources[result.get("source", "unknown")] += 1
+        elif scenario == "check_groq":
+            response = await client.get("/check_groq")
+            response.raise_for_status()
+        else:
+            response = await client.get("/languages")
+            response.raise_for_status()
+    except httpx.HTTPStatusError as e:
+        run.errors[f"http_{e.response.status_code}"] += 1
+        return
+    except Exception as e:
+        run.errors[type(e).__name__] += 1
+        return
+    run.latencies.append(time.perf_counter() - started)
+
+
+async def run_level(args, scenario, concurrency, texts):
+    run = Run()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        deadline = time.perf_counter() + args.duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                await one_request(client, scenario, texts, args, run)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return run.summary(elapsed)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def launch_server():
+    """Start the backend on FakeChatModel in a subprocess; returns (process, url) without waiting"""
+    port = free_port()
+    env = {**os.environ, "LLM_BACKEND": "fake", "PORT": str(port)}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+def spawn_server():
+    """Start the backend on FakeChatModel in a subprocess and wait until it answers"""
+    process, url = launch_server()
+    for _ in range(100):
+        try:
+            if httpx.get(f"{url}/", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Backend did not start")
+
+
+def wait_for(url, deadline):
+    """Poll `url` until it returns 200; returns the time it did, or None at `deadline`"""
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return time.perf_counter()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def measure_startup(runs, timeout):
+    """Launch the backend `runs` times, timing until /healthz (live) and /ready (ready) answer"""
+    live, ready = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        process, url = launch_server()
+        try:
+            deadline = started + timeout
+            live_at = wait_for(f"{url}/healthz", deadline)
+            ready_at = wait_for(f"{url}/ready", deadline) if live_at else None
+        finally:
+            process.terminate()
+            process.wait()
+        if ready_at is None:
+            raise RuntimeError("Backend did not become ready")
+        live.append(1000 * (live_at - started))
+        ready.append(1000 * (ready_at - started))
+    return {
+        "runs": runs,
+        "live_ms": percentile(live, 50),
+        "ready_ms": percentile(ready, 50),
+        "ready_max_ms": round(max(ready), 2),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline):
+    print(f"\nComparison with {baseline.get('commit') or 'baseline'}:")
+    if report.get("startup") and baseline.get("startup"):
+        for key in ("live_ms", "ready_ms"):
+            print(f"startup {key:<10}{baseline['startup'][key]:>10.1f} -> {report['startup'][key]:.1f}")
+    print(f"{'scenario':<12}{'conc':>6}{'rps':>18}{'p50 ms':>20}{'p99 ms':>20}")
+    old = {(r["scenario"], r["concurrency"]): r for r in baseline.get("results", [])}
+    for result in report["results"]:
+        previous = old.get((result["scenario"], result["concurrency"]))
+        if previous is None:
+            continue
+
+        def cell(key):
+            return f"{previous[key] or 0:.1f} -> {result[key] or 0:.1f}"
+
+        print(f"{result['scenario']:<12}{result['concurrency']:>6}{cell('throughput_rps'):>18}"
+              f"{cell('p50_ms'):>20}{cell('p99_ms'):>20}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the translation backend")
+    parser.add_argument("--url", default=os.environ.get("BACKEND_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--spawn", action="store_true", help="start a local backend with LLM_BACKEND=fake")
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append", dest="scenarios",
+                        help="endpoint mix to drive; repeat to run several (default: translate)")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per concurrency level")
+    parser.add_argument("--unique-texts", type=int, default=1000, help="fewer distinct texts means more cache hits")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--language", default="French")
+    parser.add_argument("--model", default="gemma2-9b-it")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--startup", type=int, default=0, metavar="RUNS",
+                        help="measure cold start over RUNS launches of a local backend instead of load")
+    args = parser.parse_args()
+
+    if args.startup:
+        startup = measure_startup(args.startup, args.timeout)
+        print(f"startup  live={startup['live_ms']} ms  ready={startup['ready_ms']} ms  "
+              f"(median of {startup['runs']}, slowest ready {startup['ready_max_ms']} ms)")
+        report = {"commit": git_commit(), "timestamp": time.time(), "startup": startup, "results": []}
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        if args.compare:
+            with open(args.compare) as f:
+                compare(report, json.load(f))
+        return
+
+    scenarios = args.scenarios or ["translate"]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    texts = make_texts(args.unique_texts)
+
+    process = None
+    if args.spawn:
+        process, args.url = spawn_server()
+    try:
+        results = []
+        for scenario in scenarios:
+            for concurrency in levels:
+                summary = asyncio.run(run_level(args, scenario, concurrency, texts))
+                results.append({"scenario": scenario, "concurrency": concurrency, **summary})
+                print(f"{scenario:<12} c={concurrency:<4} {summary['throughput_rps']:>8} rps  "
+                      f"p50={summary['p50_ms']}  p95={summary['p95_ms']}  p99={summary['p99_ms']}  "
+                      f"errors={summary['errors']}  sources={summary['sources']}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "url": args.url,
+        "fake_backend": args.spawn,
+        "duration_seconds": args.duration,
+        "unique_texts": args.unique_texts,
+        "fake_llm": {key: value for key, value in os.environ.items() if key.startswith("FAKE_LLM_")},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 import requests
 import streamlit as st
-from gtts import gTTS
-from io import BytesIO
+import streamlit.components.v1 as components
 import os 
+import json
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlencode
 
 
 # Determine the backend URL based on environment
@@ -12,6 +16,15 @@ def get_backend_url():
     return backend_url
 
 BACKEND_URL = get_backend_url()
+
+# The backend address as seen from the browser, which fetches audio and opens the live-translation
+# WebSocket itself; set it when the browser reaches the backend under a different URL than the
+# Streamlit server does
+PUBLIC_BACKEND_URL = os.environ.get("PUBLIC_BACKEND_URL", BACKEND_URL)
+
+# Seconds before cached backend metadata (models, languages) and status checks are refreshed
+METADATA_TTL = int(os.environ.get("METADATA_TTL", "300"))
+STATUS_TTL = int(os.environ.get("STATUS_TTL", "15"))
     
     
 # Page configuration
@@ -319,16 +332,60 @@ st.markdown("""
 
 # Functions
 # Update all your API call functions to use BACKEND_URL
-def check_server_connection():
+@st.cache_resource
+def get_http_session():
+    """One keep-alive connection pool to the backend, shared by every rerun and user session"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class BackgroundRefreshCache:
+    """Serves values from memory; once a value is older than its TTL it is reloaded in a background thread"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._refreshing = set()
+    
+    def get(self, name, loader, ttl):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                value, loaded_at = entry
+                if time.time() - loaded_at > ttl and name not in self._refreshing:
+                    self._refreshing.add(name)
+                    threading.Thread(target=self._refresh, args=(name, loader), daemon=True).start()
+                return value
+        value = loader()
+        with self._lock:
+            self._entries[name] = (value, time.time())
+        return value
+    
+    def _refresh(self, name, loader):
+        try:
+            value = loader()
+            with self._lock:
+                self._entries[name] = (value, time.time())
+        finally:
+            with self._lock:
+                self._refreshing.discard(name)
+
+@st.cache_resource
+def get_metadata_cache():
+    return BackgroundRefreshCache()
+
+def fetch_server_connection(session):
     try:
-        response = requests.get(f"{BACKEND_URL}/", timeout=3)
+        response = session.get(f"{BACKEND_URL}/", timeout=3)
         return response.status_code == 200
     except:
         return False
 
-def check_groq_connection():
+def fetch_groq_connection(session):
     try:
-        response = requests.get(f"{BACKEND_URL}/check_groq", timeout=5)
+        response = session.get(f"{BACKEND_URL}/check_groq", timeout=5)
         if response.status_code == 200:
             return response.json()
         else:
@@ -336,9 +393,9 @@ def check_groq_connection():
     except:
         return {"status": "error", "message": "Connection failed"}
 
-def get_available_models():
+def fetch_available_models(session):
     try:
-        response = requests.get(f"{BACKEND_URL}/models", timeout=3)
+        response = session.get(f"{BACKEND_URL}/models", timeout=3)
         if response.status_code == 200:
             return response.json().get("models", [])
         else:
@@ -346,9 +403,9 @@ def get_available_models():
     except:
         return ["gemma2-9b-it"]
 
-def get_available_languages():
+def fetch_available_languages(session):
     try:
-        response = requests.get(f"{BACKEND_URL}/languages", timeout=3)
+        response = session.get(f"{BACKEND_URL}/languages", timeout=3)
         if response.status_code == 200:
             languages = response.json().get("languages", [])
             return languages if languages else get_default_languages()
@@ -357,6 +414,22 @@ def get_available_languages():
     except:
         return get_default_languages()
 
+def check_server_connection():
+    session = get_http_session()
+    return get_metadata_cache().get("server", lambda: fetch_server_connection(session), STATUS_TTL)
+
+def check_groq_connection():
+    session = get_http_session()
+    return get_metadata_cache().get("groq", lambda: fetch_groq_connection(session), STATUS_TTL)
+
+def get_available_models():
+    session = get_http_session()
+    return get_metadata_cache().get("models", lambda: fetch_available_models(session), METADATA_TTL)
+
+def get_available_languages():
+    session = get_http_session()
+    return get_metadata_cache().get("languages", lambda: fetch_available_languages(session), METADATA_TTL)
+
 def get_default_languages():
     return ["English", "French", "Spanish", "German", "Italian", "Portuguese", 
             "Chinese", "Japanese", "Korean", "Hindi", "Arabic", "Russian"]
@@ -372,7 +445,7 @@ def get_translation(input_text, language, model_name):
     }
 
     try:
-        response = requests.post(
+        response = get_http_session().post(
             f"{BACKEND_URL}/translate", 
             json=json_body, 
             timeout=20
@@ -381,22 +454,138 @@ def get_translation(input_text, language, model_name):
     except requests.exceptions.RequestException as e:
         return {"status": "error", "message": str(e)}
 
+def get_translation_stream(input_text, language, model_name):
+    """Yield translation events from the backend as they arrive: `token` events, then one `done` event"""
+    if not input_text or not input_text.strip():
+        yield {"type": "done", "status": "error", "message": "Text is required"}
+        return
+    
+    json_body = {
+        "text": input_text.strip(),
+        "language": language,
+        "model": model_name
+    }
+
+    try:
+        with get_http_session().post(
+            f"{BACKEND_URL}/translate/stream",
+            json=json_body,
+            timeout=20,
+            stream=True
+        ) as response:
+            if response.status_code == 404:
+                # Older backend without streaming support
+                yield {"type": "done", **get_translation(input_text, language, model_name)}
+                return
+            for line in response.iter_lines(decode_unicode=True):
+                if line:
+                    yield json.loads(line)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        yield {"type": "done", "status": "error", "message": str(e)}
+
 def text_to_speech(text, language):
+    """Return the browser-facing URL of the spoken translation; the backend caches the MP3 by content"""
     try:
-        lang_code = {
-            "English": "en", "French": "fr", "Spanish": "es", "German": "de",
-            "Italian": "it", "Portuguese": "pt", "Chinese": "zh", "Japanese": "ja",
-            "Korean": "ko", "Hindi": "hi", "Arabic": "ar", "Russian": "ru"
-        }.get(language, 'en')
-        
-        tts = gTTS(text, lang=lang_code)
-        audio_file = BytesIO()
-        tts.write_to_fp(audio_file)
-        audio_file.seek(0)
-        return audio_file
+        response = get_http_session().post(
+            f"{BACKEND_URL}/tts",
+            json={"text": text, "language": language},
+            timeout=20
+        )
+        if response.status_code == 200:
+            return f"{PUBLIC_BACKEND_URL}{response.json()['url']}"
+        return None
     except Exception as e:
         return None
 
+def live_translation_url(language, model_name):
+    """WebSocket address of the backend's live translation for `language` and `model_name`"""
+    base = PUBLIC_BACKEND_URL.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+    return f"{base}/translate/live?{urlencode({'language': language, 'model': model_name})}"
+
+# Browser side of live translation: sends the whole text after every keystroke (the backend
+# debounces), applies the "patch" messages to its copy of the segments and renders them,
+# showing sentences still being translated in their source text
+LIVE_TRANSLATION_HTML = """
+<style>
+  body { margin: 0; font-family: 'Fredoka', sans-serif; }
+  textarea, .output {
+    box-sizing: border-box; width: 100%; min-height: 120px; padding: 1rem; font-size: 1.05rem;
+    border: 2px solid #4361ee; border-radius: 16px; background: rgba(255, 255, 255, 0.95);
+    color: #2d3436; font-family: inherit; white-space: pre-wrap;
+  }
+  textarea:focus { outline: none; border-color: #7209b7; }
+  .output { margin-top: 0.8rem; border-color: #7209b7; }
+  .pending { color: #88a0cc; font-style: italic; }
+  .error { color: #d63031; }
+  .status { margin-top: 0.4rem; font-size: 0.85rem; color: #3a56e6; }
+</style>
+<textarea id="input" placeholder="Type your message here... 🎯"></textarea>
+<div id="output" class="output"></div>
+<div id="status" class="status">🤖 Connecting...</div>
+<script>
+  const url = __URL__;
+  const input = document.getElementById("input");
+  const output = document.getElementById("output");
+  const status = document.getElementById("status");
+  let socket = null, version = 0, segments = [], leading = "", trailing = "";
+
+  function span(text, className) {
+    const node = document.createElement("span");
+    node.textContent = text;
+    if (className) node.className = className;
+    return node;
+  }
+
+  function render() {
+    output.replaceChildren(span(leading));
+    for (const segment of segments) {
+      if (segment.translation === null) output.append(span(segment.source, "pending"));
+      else if (segment.status === "error") output.append(span(segment.source, "error"));
+      else output.append(span(segment.translation));
+      output.append(span(segment.separator));
+    }
+    output.append(span(trailing));
+  }
+
+  function send() {
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify({text: input.value, version: ++version}));
+    }
+  }
+
+  function connect() {
+    socket = new WebSocket(url);
+    socket.onopen = () => { status.textContent = "⚡ Live"; if (input.value) send(); };
+    socket.onmessage = (event) => {
+      const message = JSON.parse(event.data);
+      if (message.type === "error") {
+        status.textContent = "🔧 " + message.message;
+        return;
+      }
+      segments.length = message.length;
+      for (const segment of message.segments) segments[segment.index] = segment;
+      leading = message.leading;
+      trailing = message.trailing;
+      render();
+      status.textContent = message.pending ? "🤖 Translating..." : "⚡ Live";
+    };
+    socket.onclose = (event) => {
+      if (event.code === 1008) return;  // rejected language or model: retrying will not help
+      status.textContent = "🤖 Reconnecting...";
+      segments = [];
+      setTimeout(connect, 1000);
+    };
+  }
+
+  input.addEventListener("input", send);
+  connect();
+</script>
+"""
+
+def render_live_translation(language, model_name):
+    url = live_translation_url(language, model_name)
+    components.html(LIVE_TRANSLATION_HTML.replace("__URL__", json.dumps(url)), height=340)
+
 # UI Components
 def render_header():
     col1, col2, col3 = st.columns([1, 3, 1])
@@ -454,6 +643,12 @@ def render_sidebar():
         
         st.markdown('<hr class="robot-divider">', unsafe_allow_html=True)
         
+        st.markdown('<p class="sidebar-text">⚡ Robot Reflexes:</p>', unsafe_allow_html=True)
+        
+        live_mode = st.checkbox("Translate as you type", value=False)
+        
+        st.markdown('<hr class="robot-divider">', unsafe_allow_html=True)
+        
         # Tech stats
         st.markdown('<p class="sidebar-text">📊 Robot Stats:</p>', unsafe_allow_html=True)
         col1, col2 = st.columns(2)
@@ -464,9 +659,9 @@ def render_sidebar():
         #     st.markdown("**AI Models**")
         #     st.markdown("##### 2")
         
-        return selected_model, enable_audio
+        return selected_model, enable_audio, live_mode
 
-def render_main_content(selected_model, enable_audio):
+def render_main_content(selected_model, enable_audio, live_mode):
     st.markdown('<div class="main-container">', unsafe_allow_html=True)
     
     col1, col2 = st.columns([2, 1])
@@ -475,12 +670,17 @@ def render_main_content(selected_model, enable_audio):
         st.markdown('<div class="chat-bubble user">', unsafe_allow_html=True)
         st.markdown('### 📝 Your Message')
         
-        input_text = st.text_area(
-            "What would you like to say?",
-            height=120,
-            placeholder="Type your message here... 🎯",
-            label_visibility="collapsed"
-        )
+        if live_mode:
+            # Rendered once the language is chosen
+            live_panel = st.empty()
+            input_text = ""
+        else:
+            input_text = st.text_area(
+                "What would you like to say?",
+                height=120,
+                placeholder="Type your message here... 🎯",
+                label_visibility="collapsed"
+            )
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
@@ -500,35 +700,54 @@ def render_main_content(selected_model, enable_audio):
         # st.markdown('🇫🇷 French · 🇪🇸 Spanish · 🇩🇪 German · 🇯🇵 Japanese · 🇨🇳 Chinese')
         # st.markdown('</div>', unsafe_allow_html=True)
     
+    if live_mode:
+        with live_panel.container():
+            render_live_translation(selected_language, selected_model)
+    
     # Translate button
-    if st.button(
+    elif st.button(
         "🚀 Activate Translation!", 
         type="primary",
         disabled=not input_text or not input_text.strip(),
         use_container_width=True
     ):
         if input_text and input_text.strip():
+            notice = st.empty()
+            heading = st.empty()
+            bubble = st.empty()
+            translation = ""
+            result = {"status": "error"}
+            
             with st.spinner('🤖 Robot is processing...'):
-                result = get_translation(input_text, selected_language, selected_model)
+                for event in get_translation_stream(input_text, selected_language, selected_model):
+                    if event.get("type") == "token":
+                        # Render the translation progressively as tokens arrive
+                        translation += event.get("text", "")
+                        bubble.markdown(f'<div class="robot-bubble">{translation}</div>', unsafe_allow_html=True)
+                    else:
+                        result = event
             
             if result.get("status") in ["success", "partial_success"]:
                 if result.get("status") == "partial_success":
-                    st.warning("Using backup translation systems! 🔄")
+                    notice.warning("Using backup translation systems! 🔄")
+                elif result.get("source") == "detection":
+                    notice.info(f"Your text is already in {selected_language}, so the robot left it as is! 🤖")
                 
-                st.markdown('### ✅ Translation Complete!')
+                heading.markdown('### ✅ Translation Complete!')
                 
                 # Display output in robot bubble
-                translation = result.get("output", "")
-                st.markdown(f'<div class="robot-bubble">{translation}</div>', unsafe_allow_html=True)
+                translation = result.get("output", translation)
+                bubble.markdown(f'<div class="robot-bubble">{translation}</div>', unsafe_allow_html=True)
                 
                 # Audio playback
                 if enable_audio:
-                    audio_file = text_to_speech(translation, selected_language)
-                    if audio_file:
-                        st.audio(audio_file, format='audio/mp3')
+                    audio_url = text_to_speech(translation, selected_language)
+                    if audio_url:
+                        st.audio(audio_url, format='audio/mp3')
                         st.info("🔊 Robot voice generated!")
             
             elif result.get("status") == "error":
+                bubble.empty()
                 st.error("Robot malfunction! Please try again 🔧")
                 st.info("Check your connection and try again soon!")
     
@@ -549,8 +768,8 @@ def render_main_content(selected_model, enable_audio):
 # Main app
 def main():
     render_header()
-    selected_model, enable_audio = render_sidebar()
-    render_main_content(selected_model, enable_audio)
+    selected_model, enable_audio, live_mode = render_sidebar()
+    render_main_content(selected_model, enable_audio, live_mode)
 
 if __name__ == "__main__":
     main()